@@ -132,6 +132,12 @@ STATIC_URL = 'static/'
 # OpenAI API Key
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 
+# Seconds a persisted FactInstance is reused before recomputing (None = until invalidated)
+FACT_INSTANCE_TTL = None
+
+# Threads used to resolve sibling fact dependencies concurrently (1 = sequential)
+FACT_RESOLVE_WORKERS = 1
+
 # Auth Redirects
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
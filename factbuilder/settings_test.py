@@ -0,0 +1,22 @@
+"""
+Test settings for factbuilder.
+
+Usage: python manage.py test <labels> --settings=factbuilder.settings_test
+"""
+
+from .settings import *  # noqa: F401,F403
+
+# Django already runs SQLite test databases in memory; spell it out so
+# --keepdb/--parallel never fall back to a file-backed database.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'NAME': ':memory:'},
+    }
+}
+
+# Fixtures call create_user(); the default PBKDF2 hasher dominates their cost.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
@@ -11,5 +11,5 @@ class FactsConfig(AppConfig):
         """
         Called when the application is ready.
         """
-        # Import signals or other startup logic if needed
-        pass
+        # Keep in-process fact caches in sync with the DB
+        from facts import signals  # noqa: F401
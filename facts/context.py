@@ -1,5 +1,6 @@
 import hashlib
 import json
+from collections.abc import Mapping
 from datetime import date, datetime
 from decimal import Decimal
 from typing import Any, Dict, List, Union
@@ -19,15 +20,15 @@ def normalize_context(context: Any) -> Any:
     """
     Normalize context for hashing recursively:
     - Sort keys
-    - Remove transient keys (user, request, session_id)
+    - Remove transient keys (user, request, session_id, _cache)
     - Convert dates to ISO strings
     - Normalize Decimal to float (or string, but float is more common for JSON)
     - Normalize lists/tuples
     """
-    if isinstance(context, dict):
+    if isinstance(context, Mapping):
         clean_ctx = {}
         for k, v in context.items():
-            if k in ['user', 'request', 'session_id']:
+            if k in ['user', 'request', 'session_id', '_cache']:
                 continue
             clean_ctx[k] = normalize_context(v)
         return clean_ctx
@@ -42,9 +43,18 @@ def normalize_context(context: Any) -> Any:
     else:
         return context
 
-def hash_context(context: Dict[str, Any]) -> str:
-    """SHA256 hash of normalized context."""
-    norm = normalize_context(context)
+def _canonical_bytes(norm: Any) -> bytes:
     # Ensure consistent ordering with sort_keys=True
     s = json.dumps(norm, sort_keys=True, separators=(',', ':'), ensure_ascii=True)
-    return hashlib.sha256(s.encode('utf-8')).hexdigest()
+    return s.encode('utf-8')
+
+def hash_normalized_context(norm: Any) -> str:
+    """
+    BLAKE2b (128-bit) hash of an already normalized context.
+    Only used as a cache key, so a 32-char digest is plenty and cheaper to compute and index.
+    """
+    return hashlib.blake2b(_canonical_bytes(norm), digest_size=16).hexdigest()
+
+def hash_context(context: Dict[str, Any]) -> str:
+    """BLAKE2b (128-bit) hash of normalized context."""
+    return hash_normalized_context(normalize_context(context))
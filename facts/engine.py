@@ -1,11 +1,12 @@
 import re
 from typing import Any, Dict, Optional, Tuple
-from .taxonomy import build_taxonomy, resolve_fact, FactStore
+from .taxonomy import build_taxonomy, compile_template, resolve_fact, instance_value, FactStore
 from .models import Question, Answer, FactInstance
 from .context import normalize_context
 from .router import IntentRouter
 import json
-from jinja2 import Template
+from datetime import date
+from django.conf import settings
 
 try:
     from agents.llm_service import LLMService
@@ -24,13 +25,15 @@ class QAEngine:
         self.router = IntentRouter()
         self.llm_service = LLMService() if LLMService else None
         
-    def answer_question(self, question_text: str, user: Optional[Any] = None) -> Dict[str, Any]:
+    def answer_question(self, question_text: str, user: Optional[Any] = None, cache: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Main entry point to answer a question.
         
         Args:
             question_text: The text of the question.
             user: The user asking the question (optional).
+            cache: Scratch dict to reuse across a batch of questions from the same user (optional),
+                so lookups memoized by fact code (e.g. the user's accounts) are fetched once.
             
         Returns:
             A dictionary containing the answer text and optional metadata.
@@ -50,6 +53,10 @@ class QAEngine:
 
         if user:
             context['user'] = user
+        # One clock reading per question, so every fact agrees on "today" (and cached instances roll over daily)
+        context['today'] = date.today()
+        # Scratch space shared by every fact resolved for this question (excluded from context hashes)
+        context['_cache'] = cache if cache is not None else {}
 
         if not fact_version:
             if self.llm_service:
@@ -60,10 +67,13 @@ class QAEngine:
         store = FactStore()
         try:
             # resolve_fact now returns a FactInstance
-            fact_instance = resolve_fact(self.registry, store, fact_version.fact_definition.id, context)
-            value = fact_instance.value
+            fact_instance = resolve_fact(
+                self.registry, store, fact_version.fact_definition_id, context,
+                max_workers=getattr(settings, 'FACT_RESOLVE_WORKERS', 1)
+            )
+            value = instance_value(fact_instance)
             
-            answer_text = self._format_answer(fact_version.fact_definition.id, value, context)
+            answer_text = self._format_answer(fact_version.fact_definition_id, value, context)
             self._save_interaction(question_obj, fact_instance, answer_text)
             return {"text": answer_text}
             
@@ -147,7 +157,7 @@ class QAEngine:
                 # Also normalize context for consistent rendering
                 norm_ctx = normalize_context(context)
                 render_ctx = {"value": value, **norm_ctx}
-                return Template(spec.output_template).render(render_ctx)
+                return compile_template(spec.output_template).render(render_ctx)
             except Exception as e:
                 print(f"Template rendering failed: {e}")
                 # Fallback to default formatting
@@ -17,7 +17,7 @@ class Command(BaseCommand):
 
     def handle(self, *args: Any, **options: Any) -> None:
         engine = QAEngine()
-        versions = FactDefinitionVersion.objects.filter(status='approved')
+        versions = FactDefinitionVersion.objects.filter(status='approved').select_related('fact_definition')
         
         total = 0
         passed = 0
@@ -47,7 +47,7 @@ class Command(BaseCommand):
                         actual = result
                     else:
                         # Direct resolution test (more robust for logic testing)
-                        from facts.taxonomy import resolve_fact, FactStore
+                        from facts.taxonomy import resolve_fact, FactStore, instance_value
                         store = FactStore()
                         instance = resolve_fact(engine.registry, store, fact_id, context)
                         
@@ -56,7 +56,7 @@ class Command(BaseCommand):
                             failed += 1
                             continue
 
-                        actual = instance.value
+                        actual = instance_value(instance)
                     
                     # Assertion
                     if self._check_match(expected, actual):
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='factinstance',
+            name='value_ipc',
+            field=models.BinaryField(blank=True, help_text='lz4-compressed Arrow IPC payload for dataframe values', null=True),
+        ),
+    ]
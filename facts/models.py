@@ -1,11 +1,16 @@
 import hashlib
 import json
+import re
+from functools import cached_property
 from typing import Any, Dict, List, Optional, Tuple
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.serializers.json import DjangoJSONEncoder
 from simple_history.models import HistoricalRecords
 
+# Numbered backreferences would shift once patterns are wrapped in a union.
+NUMBERED_BACKREF = re.compile(r'\\[1-9]')
+
 class FactDefinition(models.Model):
     """
     Represents what a fact is (stable identity).
@@ -93,6 +98,21 @@ class IntentRecognizer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @cached_property
+    def compiled_regex(self) -> Optional[re.Pattern]:
+        """
+        All regex_patterns fused into one case-insensitive alternation, each wrapped as group
+        p<index> so a match's lastgroup names the pattern that hit. None when there are no
+        patterns or they cannot be combined (clashing group names, numbered backrefs).
+        """
+        patterns = self.regex_patterns
+        if not patterns or any(NUMBERED_BACKREF.search(p) for p in patterns):
+            return None
+        try:
+            return re.compile('|'.join(f"(?P<p{idx}>{p})" for idx, p in enumerate(patterns)), re.IGNORECASE)
+        except re.error:
+            return None
+
     def __str__(self) -> str:
         return f"Recognizer for {self.fact_version}"
 
@@ -109,6 +129,7 @@ class FactInstance(models.Model):
     context = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
     context_hash = models.CharField(max_length=64, db_index=True)
     value = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    value_ipc = models.BinaryField(null=True, blank=True, help_text="lz4-compressed Arrow IPC payload for dataframe values")
     
     # Provenance fields
     provenance = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
@@ -1,6 +1,6 @@
 import re
 from typing import Optional, Dict, Any, List, Tuple
-from facts.models import FactDefinitionVersion, IntentRecognizer
+from facts.models import NUMBERED_BACKREF, FactDefinitionVersion, IntentRecognizer
 from facts.context import normalize_context
 
 try:
@@ -9,6 +9,16 @@ except ImportError:
     fuzz = None
     process = None
 
+# Bumped whenever recognizers or versions change so live routers reload lazily.
+_generation = 0
+
+def invalidate_recognizers() -> None:
+    """
+    Marks every router's compiled recognizers as stale.
+    """
+    global _generation
+    _generation += 1
+
 class IntentRouter:
     """
     Routes user questions to the appropriate fact definition version based on intent recognition.
@@ -20,12 +30,14 @@ class IntentRouter:
 
     def _load_recognizers(self) -> None:
         """
-        Loads all active recognizers into memory.
-        In a production app, this should be cached and invalidated on updates.
+        Loads all active recognizers into memory, compiling their patterns once.
+        The set is reloaded on the next route() after invalidate_recognizers().
         """
+        self._generation = _generation
         self.recognizers = []
-        # Only consider approved versions
-        versions = FactDefinitionVersion.objects.filter(status='approved').select_related('fact_definition', 'recognizer')
+        patterns = []
+        # Only consider approved versions; recognizers are tried in this order
+        versions = FactDefinitionVersion.objects.filter(status='approved').select_related('fact_definition', 'recognizer').order_by('pk')
         
         for v in versions:
             if hasattr(v, 'recognizer'):
@@ -33,26 +45,46 @@ class IntentRouter:
                 self.recognizers.append({
                     'version': v,
                     'regex': [re.compile(p, re.IGNORECASE) for p in rec.regex_patterns],
-                    'keywords': rec.keywords,
+                    'fused': rec.compiled_regex,
+                    'keywords': [k.lower() for k in rec.keywords],
                     'examples': rec.example_questions
                 })
+                patterns.extend(rec.regex_patterns)
+
+        # Union of every pattern, used only to skip the per-recognizer scan when nothing can
+        # match; which recognizer wins is always decided by recognizer order. None when the
+        # patterns cannot be combined (clashing group names, numbered backrefs).
+        self._any_regex = None
+        if patterns and not any(NUMBERED_BACKREF.search(p) for p in patterns):
+            try:
+                self._any_regex = re.compile('|'.join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+            except re.error:
+                pass
 
     def route(self, text: str) -> Tuple[Optional[FactDefinitionVersion], Dict[str, Any]]:
         """
         Routes a question to a FactDefinitionVersion and extracts parameters.
         """
-        # 1. Regex Match (Highest Priority)
-        for item in self.recognizers:
-            for pattern in item['regex']:
-                match = pattern.search(text)
-                if match:
-                    # Extract named groups as context
-                    context = match.groupdict()
-                    return item['version'], context
+        if self._generation != _generation:
+            self._load_recognizers()
+
+        # 1. Regex Match (Highest Priority): the first recognizer, then its first pattern, that matches
+        if self._any_regex is None or self._any_regex.search(text):
+            for item in self.recognizers:
+                # The fused patterns answer "does any match" in one search
+                if item['fused'] is not None and not item['fused'].search(text):
+                    continue
+                for pattern in item['regex']:
+                    match = pattern.search(text)
+                    if match:
+                        # Extract named groups as context
+                        context = match.groupdict()
+                        return item['version'], context
 
         # 2. Keyword/Fuzzy Match
         best_score = 0
         best_version = None
+        lowered = text.lower()
         
         for item in self.recognizers:
             score = 0
@@ -69,7 +101,7 @@ class IntentRouter:
             if item['keywords']:
                 # Simple keyword overlap score
                 # We normalize to 0-100 scale roughly
-                keywords_found = sum(1 for k in item['keywords'] if k.lower() in text.lower())
+                keywords_found = sum(1 for k in item['keywords'] if k in lowered)
                 if len(item['keywords']) > 0:
                     keyword_score = (keywords_found / len(item['keywords'])) * 90
                     if keyword_score > score:
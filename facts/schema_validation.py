@@ -1,5 +1,9 @@
+import json
 import jsonschema
-from jsonschema import validate, ValidationError
+from functools import lru_cache
+from jsonschema import ValidationError
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
 from typing import Any, Dict, Optional
 
 def validate_schema_definition(schema: Dict[str, Any]) -> None:
@@ -11,6 +15,16 @@ def validate_schema_definition(schema: Dict[str, Any]) -> None:
     except jsonschema.exceptions.SchemaError as e:
         raise ValueError(f"Invalid JSON Schema: {e.message}")
 
+@lru_cache(maxsize=256)
+def _validator_for(schema_json: str) -> Any:
+    """
+    Builds (and checks) a validator once per distinct schema.
+    """
+    schema = json.loads(schema_json)
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
 def validate_context(context: Dict[str, Any], schema: Dict[str, Any]) -> None:
     """
     Validates the runtime context against the provided JSON Schema.
@@ -18,7 +32,8 @@ def validate_context(context: Dict[str, Any], schema: Dict[str, Any]) -> None:
     if not schema:
         return
 
-    try:
-        validate(instance=context, schema=schema)
-    except ValidationError as e:
-        raise ValueError(f"Context validation failed: {e.message}")
+    validator = _validator_for(json.dumps(schema, sort_keys=True))
+    # Dependency contexts may be ChainMaps, which JSON Schema does not treat as objects
+    error = best_match(validator.iter_errors(context if isinstance(context, dict) else dict(context)))
+    if error is not None:
+        raise ValueError(f"Context validation failed: {error.message}")
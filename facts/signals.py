@@ -0,0 +1,29 @@
+from typing import Any
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from facts.models import FactDefinitionVersion, FactInstance, IntentRecognizer
+from facts.router import invalidate_recognizers
+from facts.taxonomy import invalidate_code_cache, invalidate_instance_cache
+
+@receiver([post_save, post_delete], sender=FactDefinitionVersion)
+def fact_version_changed(sender: Any, instance: FactDefinitionVersion, **kwargs: Any) -> None:
+    """
+    Drops in-process cached instances and compiled code for a version that was changed or removed.
+    """
+    invalidate_instance_cache(version_id=instance.pk)
+    invalidate_code_cache(version_id=instance.pk)
+    invalidate_recognizers()
+
+@receiver(post_delete, sender=FactInstance)
+def fact_instance_deleted(sender: Any, instance: FactInstance, **kwargs: Any) -> None:
+    """
+    Drops a deleted instance from the in-process cache.
+    """
+    invalidate_instance_cache(version_id=instance.fact_version_id, context_hash=instance.context_hash)
+
+@receiver([post_save, post_delete], sender=IntentRecognizer)
+def intent_recognizer_changed(sender: Any, instance: IntentRecognizer, **kwargs: Any) -> None:
+    """
+    Forces routers to recompile their recognizers on next use.
+    """
+    invalidate_recognizers()
@@ -1,22 +1,39 @@
+from collections import ChainMap, OrderedDict
 from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, List, Optional, Literal, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Literal, Tuple, Union
 import pandas as pd
 from datetime import date, datetime, timedelta
+import ast
+import asyncio
 import hashlib
+import itertools
 import json
+import keyword
 import multiprocessing
 import queue
+import textwrap
+import threading
 import traceback
-from django.db.models import Sum
-from django.db import transaction, IntegrityError
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.db.models import Case, OuterRef, Q, Subquery, Sum, Value, When
+from django.db import connections, transaction, IntegrityError
 from facts.models import FactDefinition, FactDefinitionVersion, FactInstance, FactInstanceDependency
-from facts.context import normalize_context, hash_context
+from facts.context import normalize_context, hash_normalized_context
 from facts.schema_validation import validate_context
 from facts.graph import build_dependency_graph, detect_cycles
 from facts.executor import execute_expression
 from jinja2 import Template
 from decimal import Decimal
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 # --- Fact Infrastructure ---
 
 FactKind = Literal["observed", "computed"]
@@ -54,9 +71,67 @@ class FactRegistry:
     def all_specs(self) -> Dict[str, FactSpec]:
         return self._specs
 
+class LRUCache:
+    """
+    Small thread-safe LRU mapping, used as an in-process cache in front of the DB.
+    """
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Any], bool]) -> None:
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+# Successful persisted instances keyed by (version_id, context_hash)
+_instance_cache = LRUCache(maxsize=4096)
+
+def _cache_instance(key: Tuple[int, str], instance: FactInstance) -> None:
+    """
+    Caches an instance once the enclosing transaction commits, so rolled-back rows are never served.
+    """
+    transaction.on_commit(lambda: _instance_cache.set(key, instance))
+
+def invalidate_instance_cache(version_id: Optional[int] = None, context_hash: Optional[str] = None) -> None:
+    """
+    Drops cached instances for a fact version, optionally for a single context
+    (or everything if no version is given).
+    """
+    if version_id is None:
+        _instance_cache.clear()
+    elif context_hash is not None:
+        _instance_cache.pop((version_id, context_hash))
+    else:
+        _instance_cache.discard_where(lambda key: key[0] == version_id)
+
 class FactStore:
     def __init__(self) -> None:
         self._instances: Dict[str, FactInstance] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
 
     def set(self, fact_id: str, instance: FactInstance) -> None:
         self._instances[fact_id] = instance
@@ -67,26 +142,28 @@ class FactStore:
     def has(self, fact_id: str) -> bool:
         return fact_id in self._instances
 
-def resolve_fact(reg: FactRegistry, store: FactStore, fact_id: str, context: Optional[Dict[str, Any]] = None) -> FactInstance:
-    if context is None:
-        context = {}
-        
-    # Check in-memory store first
-    # Note: We might need to key by (fact_id, context_hash) in store if we reuse store across different contexts
-    # For now, assuming store is per-request and context might vary for same fact if called with different params.
-    # But resolve_fact is usually called with a specific context.
-    # If we have recursive calls with DIFFERENT contexts, simple dict[fact_id] is insufficient.
-    # Let's upgrade store key to include context hash.
-    ctx_hash = hash_context(context)
-    store_key = f"{fact_id}:{ctx_hash}"
-    
-    if store.has(store_key):
-        return store.get(store_key)
+    def lock(self, fact_id: str) -> asyncio.Lock:
+        """
+        Per-key lock so concurrent async resolutions of the same fact/context compute it once.
+        """
+        lock = self._locks.get(fact_id)
+        if lock is None:
+            lock = self._locks[fact_id] = asyncio.Lock()
+        return lock
 
-    spec = reg.spec(fact_id)
-    if not spec:
-        raise ValueError(f"Fact {fact_id} not registered")
+def _freshness_cutoff() -> Optional[datetime]:
+    """
+    Oldest computed_at still reusable under settings.FACT_INSTANCE_TTL, or None if instances never expire.
+    """
+    ttl = getattr(settings, 'FACT_INSTANCE_TTL', None)
+    if ttl is None:
+        return None
+    return timezone.now() - timedelta(seconds=ttl)
 
+def _lookup_instance(spec: FactSpec, store: FactStore, store_key: str, context: Dict[str, Any], normalized_ctx: Dict[str, Any], ctx_hash: str) -> Optional[FactInstance]:
+    """
+    Returns an already-known instance for this fact/context (schema error or DB cache hit), if any.
+    """
     # Validate context against schema if available
     if spec.parameters_schema:
         try:
@@ -96,29 +173,53 @@ def resolve_fact(reg: FactRegistry, store: FactStore, fact_id: str, context: Opt
             instance = FactInstance(
                 status='error',
                 error=str(e),
-                context=normalize_context(context),
+                context=normalized_ctx,
                 context_hash=ctx_hash
             )
             store.set(store_key, instance)
             return instance
 
-    # Check DB cache if we have a version object
+    # Check in-process cache, then DB cache, if we have a version object
     if spec.version_obj:
-        cached = FactInstance.objects.filter(
-            fact_version=spec.version_obj,
-            context_hash=ctx_hash,
-            status='success'
-        ).first()
+        cache_key = (spec.version_obj.pk, ctx_hash)
+        cutoff = _freshness_cutoff()
+        cached = _instance_cache.get(cache_key)
+        if cached is not None and cutoff is not None and cached.computed_at < cutoff:
+            _instance_cache.pop(cache_key)
+            cached = None
+        if cached is None:
+            qs = FactInstance.objects.filter(
+                fact_version=spec.version_obj,
+                context_hash=ctx_hash,
+                status='success'
+            )
+            if cutoff is not None:
+                qs = qs.filter(computed_at__gte=cutoff)
+            cached = qs.order_by('-computed_at').first()
+            if cached:
+                _cache_instance(cache_key, cached)
         if cached:
             store.set(store_key, cached)
             return cached
 
-    # Resolve dependencies
-    dep_instances = {}
-    
+    return None
+
+@lru_cache(maxsize=1024)
+def compile_template(source: str) -> Template:
+    """
+    Parses a Jinja2 template once per distinct source (param mappings, output templates).
+    """
+    return Template(source)
+
+def _dependency_contexts(spec: FactSpec, context: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Returns the (dependency fact id, dependency context) pairs to resolve for a spec.
+    """
+    edges = []
+
     # 1. Handle legacy simple requires
     for dep_id in spec.requires:
-        dep_instances[dep_id] = resolve_fact(reg, store, dep_id, context)
+        edges.append((dep_id, context))
 
     # 2. Handle structured dependencies
     for edge in spec.dependencies:
@@ -130,28 +231,187 @@ def resolve_fact(reg: FactRegistry, store: FactStore, fact_id: str, context: Opt
             except Exception:
                 continue # Skip if condition fails or errors
         
-        # Map parameters
-        dep_context = context.copy()
+        # Map parameters (overrides are layered over the parent context instead of copying it)
+        overrides = {}
         if edge.param_mapping:
             for target_key, template_str in edge.param_mapping.items():
                 try:
                     # Use Jinja2 to render value from parent context
-                    val = Template(template_str).render(context)
+                    val = compile_template(template_str).render(context)
                     # Attempt to convert types if needed (simple inference)
                     if val.isdigit():
                         val = int(val)
                     elif val.replace('.', '', 1).isdigit():
                         val = float(val)
-                    dep_context[target_key] = val
+                    overrides[target_key] = val
                 except Exception:
                     pass # Keep default or fail?
         
-        dep_instances[edge.to_fact_id] = resolve_fact(reg, store, edge.to_fact_id, dep_context)
+        dep_context = ChainMap(overrides, context) if overrides else context
+        edges.append((edge.to_fact_id, dep_context))
+
+    return edges
+
+class _ThreadedResolution:
+    """
+    One resolve_fact(max_workers > 1) call: a single shared pool, plus in-flight futures keyed by
+    (fact_id, ctx_hash) so a dependency reached through several paths is produced once.
+    """
+    def __init__(self, reg: FactRegistry, store: FactStore, pool: ThreadPoolExecutor) -> None:
+        self.reg = reg
+        self.store = store
+        self.pool = pool
+        self.inflight: Dict[Tuple[str, str], Future] = {}
+        self.lock = threading.Lock()
+
+    def resolve(self, fact_id: str, context: Dict[str, Any]) -> FactInstance:
+        normalized_ctx = normalize_context(context)
+        ctx_hash = hash_normalized_context(normalized_ctx)
+        with self.lock:
+            claimed = self.inflight.get((fact_id, ctx_hash))
+            if claimed is None:
+                pending = self.inflight[(fact_id, ctx_hash)] = Future()
+        if claimed is not None:
+            return claimed.result()
+
+        try:
+            instance = self._compute(fact_id, context, normalized_ctx, ctx_hash)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        pending.set_result(instance)
+        return instance
+
+    def _run_in_worker(self, fact_id: str, context: Dict[str, Any]) -> FactInstance:
+        try:
+            return self.resolve(fact_id, context)
+        finally:
+            connections.close_all()
+
+    def _compute(self, fact_id: str, context: Dict[str, Any], normalized_ctx: Dict[str, Any], ctx_hash: str) -> FactInstance:
+        store_key = f"{fact_id}:{ctx_hash}"
+        if self.store.has(store_key):
+            return self.store.get(store_key)
+
+        spec = self.reg.spec(fact_id)
+        if not spec:
+            raise ValueError(f"Fact {fact_id} not registered")
+
+        known = _lookup_instance(spec, self.store, store_key, context, normalized_ctx, ctx_hash)
+        if known:
+            return known
+
+        # Siblings go to the pool; the first is resolved here so this thread keeps working
+        edges = _dependency_contexts(spec, context)
+        futures = [self.pool.submit(self._run_in_worker, dep_id, dep_context) for dep_id, dep_context in edges[1:]]
+        dep_instances = {}
+        if edges:
+            dep_instances[edges[0][0]] = self.resolve(*edges[0])
+        for (dep_id, dep_context), future in zip(edges[1:], futures):
+            # A task no worker has picked up yet runs inline, so waiting parents cannot starve the pool
+            dep_instances[dep_id] = self.resolve(dep_id, dep_context) if future.cancel() else future.result()
+
+        return _produce(self.reg, self.store, spec, store_key, context, normalized_ctx, ctx_hash, dep_instances)
+
+def resolve_fact(reg: FactRegistry, store: FactStore, fact_id: str, context: Optional[Dict[str, Any]] = None, max_workers: int = 1) -> FactInstance:
+    """
+    Resolves a fact and its dependencies, reusing stored or persisted instances.
+    With max_workers > 1, sibling dependencies are resolved on one shared thread pool so
+    their DB round-trips overlap, and a dependency shared by siblings is produced once.
+    Worker threads use their own DB connections, so they only see committed data.
+    """
+    if context is None:
+        context = {}
+
+    if max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return _ThreadedResolution(reg, store, pool).resolve(fact_id, context)
+        
+    # Check in-memory store first
+    # Note: We might need to key by (fact_id, context_hash) in store if we reuse store across different contexts
+    # For now, assuming store is per-request and context might vary for same fact if called with different params.
+    # But resolve_fact is usually called with a specific context.
+    # If we have recursive calls with DIFFERENT contexts, simple dict[fact_id] is insufficient.
+    # Let's upgrade store key to include context hash.
+    normalized_ctx = normalize_context(context)
+    ctx_hash = hash_normalized_context(normalized_ctx)
+    store_key = f"{fact_id}:{ctx_hash}"
+    
+    if store.has(store_key):
+        return store.get(store_key)
+
+    spec = reg.spec(fact_id)
+    if not spec:
+        raise ValueError(f"Fact {fact_id} not registered")
+
+    known = _lookup_instance(spec, store, store_key, context, normalized_ctx, ctx_hash)
+    if known:
+        return known
+
+    # Resolve dependencies
+    dep_instances = {}
+    for dep_id, dep_context in _dependency_contexts(spec, context):
+        dep_instances[dep_id] = resolve_fact(reg, store, dep_id, dep_context)
+
+    return _produce(reg, store, spec, store_key, context, normalized_ctx, ctx_hash, dep_instances)
+
+def _in_worker(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wraps fn to run on a pooled worker thread (not the shared sync thread), releasing the
+    worker's own DB connection afterwards so concurrent siblings really overlap.
+    """
+    def run(*args: Any) -> Any:
+        try:
+            return fn(*args)
+        finally:
+            connections.close_all()
+    return sync_to_async(run, thread_sensitive=False)
+
+async def aresolve_fact(reg: FactRegistry, store: FactStore, fact_id: str, context: Optional[Dict[str, Any]] = None) -> FactInstance:
+    """
+    Async variant of resolve_fact: sibling dependencies are resolved concurrently
+    so their DB lookups/persistence can overlap. ORM and producer work runs on worker
+    threads with their own DB connections, so like max_workers > 1 it only sees committed data.
+    """
+    if context is None:
+        context = {}
+
+    normalized_ctx = normalize_context(context)
+    ctx_hash = hash_normalized_context(normalized_ctx)
+    store_key = f"{fact_id}:{ctx_hash}"
+
+    if store.has(store_key):
+        return store.get(store_key)
+
+    spec = reg.spec(fact_id)
+    if not spec:
+        raise ValueError(f"Fact {fact_id} not registered")
+
+    async with store.lock(store_key):
+        # Another coroutine may have resolved it while we waited
+        if store.has(store_key):
+            return store.get(store_key)
+
+        known = await _in_worker(_lookup_instance)(spec, store, store_key, context, normalized_ctx, ctx_hash)
+        if known:
+            return known
+
+        edges = _dependency_contexts(spec, context)
+        resolved = await asyncio.gather(*[aresolve_fact(reg, store, dep_id, dep_context) for dep_id, dep_context in edges])
+        dep_instances = {dep_id: inst for (dep_id, _), inst in zip(edges, resolved)}
+
+        return await _in_worker(_produce)(reg, store, spec, store_key, context, normalized_ctx, ctx_hash, dep_instances)
+
+def _produce(reg: FactRegistry, store: FactStore, spec: FactSpec, store_key: str, context: Dict[str, Any], normalized_ctx: Dict[str, Any], ctx_hash: str, dep_instances: Dict[str, FactInstance]) -> FactInstance:
+    """
+    Runs the producer on resolved dependencies, persists the result if versioned and stores it.
+    """
+    fact_id = spec.id
 
     # Prepare values for producer (Hydrate DataFrames if needed)
     dep_values = {}
     for k, inst in dep_instances.items():
-        val = inst.value
+        val = instance_value(inst)
         if val is not None:
             dep_spec = reg.spec(k)
             # If the dependency is a dataframe type but stored as a list of dicts, convert it
@@ -186,14 +446,17 @@ def resolve_fact(reg: FactRegistry, store: FactStore, fact_id: str, context: Opt
     # Provenance data
     provenance = {
         "dependency_instance_ids": [d.id for d in dep_instances.values() if d.id],
-        "input_context": normalize_context(context),
+        "input_context": normalized_ctx,
         "timestamp": datetime.now().isoformat()
     }
 
     if spec.version_obj:
         # Dehydrate DataFrames for storage
         value_to_store = value
-        if isinstance(value, pd.DataFrame):
+        value_ipc = dataframe_to_ipc(value) if isinstance(value, pd.DataFrame) else None
+        if value_ipc is not None:
+            value_to_store = None
+        elif isinstance(value, pd.DataFrame):
             # Convert dates to strings for JSON serialization
             df_copy = value.copy()
             for col in df_copy.columns:
@@ -214,18 +477,29 @@ def resolve_fact(reg: FactRegistry, store: FactStore, fact_id: str, context: Opt
             
         try:
             with transaction.atomic():
+                defaults = {
+                    'context': normalized_ctx,
+                    'value': value_to_store,
+                    'value_ipc': value_ipc,
+                    'status': status,
+                    'error': error,
+                    'provenance': provenance
+                }
                 instance, created = FactInstance.objects.get_or_create(
                     fact_version=spec.version_obj,
                     context_hash=ctx_hash,
-                    defaults={
-                        'context': normalize_context(context),
-                        'value': value_to_store,
-                        'status': status,
-                        'error': error,
-                        'provenance': provenance
-                    }
+                    defaults=defaults
                 )
-                if created:
+                cutoff = _freshness_cutoff()
+                expired = not created and cutoff is not None and instance.computed_at < cutoff
+                if expired:
+                    # Refresh the expired row in place; (version, context_hash) is unique
+                    for name, field_value in defaults.items():
+                        setattr(instance, name, field_value)
+                    instance.computed_at = timezone.now()
+                    instance.save()
+                    instance.dependencies.all().delete()
+                if created or expired:
                     # Link dependencies
                     for dep_id, dep_inst in dep_instances.items():
                         if dep_inst.id: # Only if persisted
@@ -240,6 +514,12 @@ def resolve_fact(reg: FactRegistry, store: FactStore, fact_id: str, context: Opt
                 fact_version=spec.version_obj,
                 context_hash=ctx_hash
             )
+
+        cache_key = (spec.version_obj.pk, ctx_hash)
+        if instance.status == 'success':
+            _cache_instance(cache_key, instance)
+        else:
+            _instance_cache.pop(cache_key)
     else:
         # Ephemeral instance
         instance = FactInstance(
@@ -256,17 +536,39 @@ def resolve_fact(reg: FactRegistry, store: FactStore, fact_id: str, context: Opt
         
     return instance
 
+def dataframe_to_ipc(df: pd.DataFrame) -> Optional[bytes]:
+    """
+    Serializes a DataFrame to an lz4-compressed Arrow IPC stream.
+    Returns None if pyarrow is unavailable or the frame can't be converted (JSON records are used instead).
+    """
+    if pa is None:
+        return None
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression='lz4')) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    except (pa.ArrowException, TypeError, ValueError):
+        return None
+
+def instance_value(instance: FactInstance) -> Any:
+    """
+    Returns the value of an instance, decoding Arrow IPC payloads back into a DataFrame.
+    """
+    if instance.value_ipc is not None and pa is not None:
+        return pa.ipc.open_stream(pa.py_buffer(instance.value_ipc)).read_all().to_pandas()
+    return instance.value
+
 def to_dot(reg: FactRegistry) -> str:
-    lines = ["digraph FactTaxonomy {", 'rankdir="LR";', 'node [shape=box];']
-    for spec in reg.all_specs().values():
-        label = f"{spec.id}\\n({spec.kind}, {spec.data_type})"
-        lines.append(f'"{spec.id}" [label="{label}"];')
-        for dep in spec.requires:
-            lines.append(f'"{dep}" -> "{spec.id}";')
-        for edge in spec.dependencies:
-            lines.append(f'"{edge.to_fact_id}" -> "{spec.id}" [label="mapped"];')
-    lines.append("}")
-    return "\n".join(lines)
+    def spec_lines(spec: FactSpec) -> Iterator[str]:
+        yield f'"{spec.id}" [label="{spec.id}\\n({spec.kind}, {spec.data_type})"];'
+        yield from (f'"{dep}" -> "{spec.id}";' for dep in spec.requires)
+        yield from (f'"{edge.to_fact_id}" -> "{spec.id}" [label="mapped"];' for edge in spec.dependencies)
+
+    header = ("digraph FactTaxonomy {", 'rankdir="LR";', 'node [shape=box];')
+    body = itertools.chain.from_iterable(spec_lines(spec) for spec in reg.all_specs().values())
+    return "\n".join(itertools.chain(header, body, ("}",)))
 
 # --- Registry Setup ---
 
@@ -282,9 +584,6 @@ def build_taxonomy() -> FactRegistry:
         if not version:
             continue
             
-        # Create producer
-        producer_func = create_dynamic_producer(version.code)
-        
         # Parse structured dependencies
         structured_deps = []
         if version.dependencies:
@@ -294,6 +593,9 @@ def build_taxonomy() -> FactRegistry:
                     param_mapping=d.get('with', {}),
                     condition=d.get('when')
                 ))
+
+        # Create producer
+        producer_func = create_dynamic_producer(version.code, version.requires + [e.to_fact_id for e in structured_deps], version=version)
             
         if producer_func:
             reg.register(FactSpec(
@@ -317,7 +619,20 @@ def build_taxonomy() -> FactRegistry:
 
     return reg
 
-def create_dynamic_producer(code_str: str) -> Callable:
+# Compiled producer functions keyed by (version_id, code), shared across registries
+_code_cache: Dict[Tuple[int, str], Callable] = {}
+
+def invalidate_code_cache(version_id: Optional[int] = None) -> None:
+    """
+    Drops compiled producers for a fact version (or everything if no version is given).
+    """
+    if version_id is None:
+        _code_cache.clear()
+    else:
+        for key in [k for k in list(_code_cache) if k[0] == version_id]:
+            _code_cache.pop(key, None)
+
+def create_dynamic_producer(code_str: str, requires: Optional[List[str]] = None, version: Optional[FactDefinitionVersion] = None) -> Callable:
     # We just return the code string or a wrapper, 
     # but for safe_execute we need the code to be executed in a restricted env.
     # Here we return a callable that safe_execute can use or inspect.
@@ -335,10 +650,120 @@ def create_dynamic_producer(code_str: str) -> Callable:
         pass
     
     dynamic_producer.code = code_str
+    # Declared dependencies whose ids are plain identifiers are bound to locals,
+    # so the code can use `all_transactions` instead of `deps['all_transactions']`.
+    dynamic_producer.bound_deps = [
+        dep_id for dep_id in (requires or [])
+        if dep_id.isidentifier() and not keyword.iskeyword(dep_id)
+        and dep_id not in ('deps', 'context') and dep_id not in _SAFE_GLOBALS and dep_id not in _SAFE_GLOBALS['__builtins__']
+    ]
+    dynamic_producer.func = None # Compiled on first execution
+    if version is not None and version.pk is not None:
+        dynamic_producer.cache_key = (version.pk, code_str)
+        dynamic_producer.filename = f"<fact:{version.fact_definition_id}:v{version.version}>"
+        dynamic_producer.func = _code_cache.get(dynamic_producer.cache_key)
     return dynamic_producer
 
+def precompile_versions(versions: Iterable[FactDefinitionVersion]) -> None:
+    """
+    Compiles the code of saved Python fact versions into the shared code cache,
+    so the first question that resolves each one skips parsing it.
+    """
+    for version in versions:
+        if version.pk is None or version.logic_type != 'python':
+            continue
+        requires = version.requires + [d.get('id') for d in (version.dependencies or [])]
+        producer = create_dynamic_producer(version.code, requires, version=version)
+        if producer.func is None:
+            _code_cache[producer.cache_key] = _compile_producer(version.code, producer.bound_deps, producer.filename)
+
 # --- Safe Execution ---
 
+# Imports needed for the dynamic code
+try:
+    from finance.models import BankTransaction, CreditCardTransaction, Account
+except ImportError:
+    # Fallback if finance app is not available (e.g. in tests)
+    BankTransaction = None
+    CreditCardTransaction = None
+    Account = None
+
+def get_user_accounts(context: Dict[str, Any]) -> List[Any]:
+    """
+    Returns the context user's accounts, memoized in the per-question context['_cache'] when present.
+    """
+    cache = context.get('_cache')
+    if cache is not None and 'accounts' in cache:
+        return cache['accounts']
+    accounts = list(Account.objects.filter(user=context.get('user')).only('id', 'name'))
+    if cache is not None:
+        cache['accounts'] = accounts
+    return accounts
+
+def get_user_account_ids(context: Dict[str, Any]) -> Tuple[int, ...]:
+    """
+    Returns the context user's account ids as a tuple, for account_id__in filters that
+    should compile to a plain IN list. Memoized alongside the accounts.
+    """
+    cache = context.get('_cache')
+    if cache is not None and 'account_ids' in cache:
+        return cache['account_ids']
+    account_ids = tuple(acc.id for acc in get_user_accounts(context))
+    if cache is not None:
+        cache['account_ids'] = account_ids
+    return account_ids
+
+# Restricted globals, built once and shared by every dynamic producer
+_SAFE_GLOBALS = {
+    "__builtins__": {
+        "len": len, "min": min, "max": max, "sum": sum, "abs": abs,
+        "sorted": sorted, "range": range, "enumerate": enumerate,
+        "map": map, "filter": filter, "any": any, "all": all,
+        "list": list, "dict": dict, "set": set, "tuple": tuple,
+        "int": int, "float": float, "str": str, "bool": bool,
+        "print": print, # Optional, maybe redirect stdout
+        "__import__": __import__, # Allow imports for now to fix the error
+    },
+    "pd": pd, # Whitelisted pandas
+    "Decimal": Decimal,
+    "date": date,
+    "datetime": datetime,
+    "timedelta": timedelta,
+    "Sum": Sum,
+    "OuterRef": OuterRef,
+    "Subquery": Subquery,
+    "Q": Q,
+    "Case": Case,
+    "When": When,
+    "Value": Value,
+    "get_user_accounts": get_user_accounts,
+    "get_user_account_ids": get_user_account_ids,
+    "BankTransaction": BankTransaction,
+    "CreditCardTransaction": CreditCardTransaction,
+    "Account": Account
+}
+
+def _compile_producer(code_str: str, bound_deps: List[str], filename: str) -> Callable:
+    """
+    Turns fact code into a callable taking (deps, context).
+    Code that defines its own `producer(deps, ctx)` is used as-is; otherwise it is
+    treated as a function body, with identifier-like dependencies bound as locals.
+    Each producer gets its own copy of the safe globals, so `global` writes stay local to it.
+    """
+    # Evenly indented code ran fine once wrapped, so strip the common indent before parsing
+    code_str = textwrap.dedent(code_str)
+    if any(isinstance(node, ast.FunctionDef) and node.name == 'producer' for node in ast.parse(code_str).body):
+        namespace = dict(_SAFE_GLOBALS)
+        exec(compile(code_str, filename, 'exec'), namespace)
+        return namespace['producer']
+
+    prelude = [f"    {dep_id} = deps.get({dep_id!r})" for dep_id in bound_deps]
+    wrapped_code = f"def dynamic_producer(deps, context):\n" + "\n".join(prelude + ["    " + line for line in code_str.splitlines()])
+
+    local_scope = {}
+    exec(compile(wrapped_code, filename, 'exec'), dict(_SAFE_GLOBALS), local_scope)
+    return local_scope['dynamic_producer']
+
 def safe_execute(producer_func: Callable, deps: Dict[str, Any], context: Dict[str, Any], logic_type: str = 'python', timeout: int = 5) -> Any:
     """
     Executes the producer directly in the current process (INSECURE for untrusted code).
@@ -358,47 +783,21 @@ def safe_execute(producer_func: Callable, deps: Dict[str, Any], context: Dict[st
 
     # Python execution (Local)
     try:
-        # Imports needed for the dynamic code
-        try:
-            from finance.models import BankTransaction, CreditCardTransaction, Account
-        except ImportError:
-            # Fallback if finance app is not available (e.g. in tests)
-            BankTransaction = None
-            CreditCardTransaction = None
-            Account = None
-        
-        # Restricted globals
-        safe_globals = {
-            "__builtins__": {
-                "len": len, "min": min, "max": max, "sum": sum, "abs": abs,
-                "sorted": sorted, "range": range, "enumerate": enumerate,
-                "map": map, "filter": filter, "any": any, "all": all,
-                "list": list, "dict": dict, "set": set, "tuple": tuple,
-                "int": int, "float": float, "str": str, "bool": bool,
-                "print": print, # Optional, maybe redirect stdout
-                "__import__": __import__, # Allow imports for now to fix the error
-            },
-            "pd": pd, # Whitelisted pandas
-            "Decimal": Decimal,
-            "date": date,
-            "datetime": datetime,
-            "timedelta": timedelta,
-            "Sum": Sum,
-            "BankTransaction": BankTransaction,
-            "CreditCardTransaction": CreditCardTransaction,
-            "Account": Account
-        }
-        
-        local_scope = {}
-        wrapped_code = f"def dynamic_producer(deps, context):\n" + "\n".join(["    " + line for line in code_str.splitlines()])
-        
-        exec(wrapped_code, safe_globals, local_scope)
-        func = local_scope['dynamic_producer']
+        func = getattr(producer_func, 'func', None)
+        if func is None:
+            # Compile once per version; later calls are a plain function call
+            func = producer_func.func = _compile_producer(
+                code_str,
+                getattr(producer_func, 'bound_deps', []),
+                getattr(producer_func, 'filename', '<dynamic_producer>')
+            )
+            cache_key = getattr(producer_func, 'cache_key', None)
+            if cache_key is not None:
+                _code_cache[cache_key] = func
         
         # Execute directly
         return func(deps, context)
         
     except Exception as e:
-        import traceback
         tb = traceback.format_exc()
         raise RuntimeError(f"Error executing fact logic: {str(e)}\n{tb}")
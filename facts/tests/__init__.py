@@ -1,3 +1,23 @@
 """
 Tests for the facts application.
 """
+from typing import Any, Dict, List
+
+from facts.models import FactDefinition, FactDefinitionVersion, IntentRecognizer
+
+class FactSeedMixin:
+    """
+    Shared seeding for test cases that describe facts as definition/version/recognizer dicts.
+    """
+    @classmethod
+    def _bulk_seed_facts(cls, facts: List[Dict[str, Any]]) -> None:
+        """
+        Seed definitions, versions and recognizers with one bulk insert each.
+        """
+        FactDefinition.objects.bulk_create([f['definition'] for f in facts])
+        versions = FactDefinitionVersion.objects.bulk_create([
+            FactDefinitionVersion(fact_definition=f['definition'], version=1, **f['version']) for f in facts
+        ])
+        IntentRecognizer.objects.bulk_create([
+            IntentRecognizer(fact_version=ver, **f['recognizer']) for f, ver in zip(facts, versions)
+        ])
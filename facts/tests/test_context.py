@@ -1,5 +1,6 @@
 from django.test import TestCase
 from facts.context import normalize_context, hash_context
+from collections import ChainMap
 from datetime import date
 from decimal import Decimal
 
@@ -42,3 +43,16 @@ class ContextTests(TestCase):
         # But if input is already string, it stays string.
         # So they should match.
         self.assertEqual(hash_context(ctx3), hash_context(ctx4))
+
+    def test_hash_context_digest(self) -> None:
+        """
+        Test that the cache key is a 128-bit BLAKE2b digest.
+        """
+        self.assertEqual(len(hash_context({"a": 1})), 32)
+
+    def test_hash_context_chainmap(self) -> None:
+        """
+        Test that a layered (ChainMap) context hashes the same as the equivalent flat dict.
+        """
+        parent = {"a": 1, "b": 2}
+        self.assertEqual(hash_context(ChainMap({"b": 3}, parent)), hash_context({"a": 1, "b": 3}))
@@ -2,106 +2,120 @@ from django.test import TestCase
 from django.contrib.auth.models import User
 from finance.models import Account, BankTransaction
 from facts.engine import QAEngine
-from facts.models import FactDefinition, FactDefinitionVersion, IntentRecognizer, FactInstance
+from facts.tests import FactSeedMixin
+from facts.taxonomy import instance_value
+from facts.models import FactDefinition, FactInstance
 from decimal import Decimal
 from datetime import date, timedelta
-from typing import List
+from typing import Any, Dict, List
 
-class Level0TrustGroundTruthTest(TestCase):
+class Level0TrustGroundTruthTest(FactSeedMixin, TestCase):
     """
     Tests for Level 0 facts ensuring ground truth accuracy for account balances.
     """
-    def setUp(self) -> None:
+    @classmethod
+    def setUpTestData(cls) -> None:
         """
         Set up user, accounts, transactions, and facts for testing.
         """
         # 1. Create User
-        self.user = User.objects.create_user(username='testuser', password='password')
+        cls.user = User.objects.create_user(username='testuser', password='password')
         
         # 2. Create Accounts
-        self.acc1 = Account.objects.create(name='Checking', user=self.user)
-        self.acc2 = Account.objects.create(name='Savings', user=self.user)
+        cls.acc1 = Account.objects.create(name='Checking', user=cls.user)
+        cls.acc2 = Account.objects.create(name='Savings', user=cls.user)
         
         # 3. Create Transactions
-        # Account 1: Latest balance is 1000.00
-        BankTransaction.objects.create(
-            account=self.acc1,
-            details='DEBIT',
-            posting_date=date(2023, 1, 1),
-            description='Old Tx',
-            amount=-50.00,
-            type='DEBIT',
-            balance=500.00
-        )
-        BankTransaction.objects.create(
-            account=self.acc1,
-            details='DEBIT',
-            posting_date=date(2023, 1, 5),
-            description='Latest Tx Acc1',
-            amount=-10.00,
-            type='DEBIT',
-            balance=1000.00
-        )
-        # Add a newer transaction with NULL balance (should be ignored)
-        BankTransaction.objects.create(
-            account=self.acc1,
-            details='PENDING',
-            posting_date=date(2023, 1, 6),
-            description='Pending Tx',
-            amount=-20.00,
-            type='DEBIT',
-            balance=None
-        )
+        BankTransaction.objects.bulk_create([
+            # Account 1: Latest balance is 1000.00
+            BankTransaction(
+                account=cls.acc1,
+                details='DEBIT',
+                posting_date=date(2023, 1, 1),
+                description='Old Tx',
+                amount=-50.00,
+                type='DEBIT',
+                balance=500.00
+            ),
+            BankTransaction(
+                account=cls.acc1,
+                details='DEBIT',
+                posting_date=date(2023, 1, 5),
+                description='Latest Tx Acc1',
+                amount=-10.00,
+                type='DEBIT',
+                balance=1000.00
+            ),
+            # Add a newer transaction with NULL balance (should be ignored)
+            BankTransaction(
+                account=cls.acc1,
+                details='PENDING',
+                posting_date=date(2023, 1, 6),
+                description='Pending Tx',
+                amount=-20.00,
+                type='DEBIT',
+                balance=None
+            ),
 
-        # Account 2: Latest balance is 2500.50
-        BankTransaction.objects.create(
-            account=self.acc2,
-            details='CREDIT',
-            posting_date=date(2023, 1, 4),
-            description='Latest Tx Acc2',
-            amount=2500.50,
-            type='CREDIT',
-            balance=2500.50
-        )
+            # Account 2: Latest balance is 2500.50
+            BankTransaction(
+                account=cls.acc2,
+                details='CREDIT',
+                posting_date=date(2023, 1, 4),
+                description='Latest Tx Acc2',
+                amount=2500.50,
+                type='CREDIT',
+                balance=2500.50
+            )
+        ])
 
         # 4. Seed Facts (Simulate setup_data)
-        self.setup_level0_facts()
-        
+        cls.setup_level0_facts()
+
+    def setUp(self) -> None:
+        """
+        Build a fresh engine for each test.
+        """
         self.engine = QAEngine()
 
-    def setup_level0_facts(self) -> None:
+    @classmethod
+    def setup_level0_facts(cls) -> None:
         """
         Define and register Level 0 facts for testing.
         """
+        facts = []
+
         # 1. money.cash_balance
         cash_balance_code = """
 user = context.get('user')
 if not user:
     return {'error': 'No user context'}
 
-accounts = Account.objects.filter(user=user)
-total = Decimal('0.00')
-
-for acc in accounts:
-    # Get latest transaction with non-null balance
-    tx = BankTransaction.objects.filter(account=acc, balance__isnull=False).order_by('-posting_date', '-id').first()
-    if tx:
-        # balance is float in DB, convert to string first for Decimal safety
-        total += Decimal(str(tx.balance))
+# Sum the latest transaction with non-null balance per account in the DB
+latest_id = BankTransaction.objects.filter(
+    account=OuterRef('account'),
+    balance__isnull=False
+).order_by('-posting_date', '-id').values('id')[:1]
+agg = BankTransaction.objects.filter(
+    account__user=user,
+    balance__isnull=False,
+    id=Subquery(latest_id)
+).aggregate(total=Sum('balance'))
+total = agg['total'] or Decimal('0.00')
 
 return {
     "cash_balance": float(total),
     "currency": "USD"
 }
 """
-        self._create_fact_with_intent(
+        facts.append(cls._fact_with_intent(
             id="money.cash_balance",
             desc="Current total cash balance across all accounts",
             code=cash_balance_code,
             data_type="dict",
             regex_patterns=[r"what is my (current )?cash balance\??"],
             keywords=["cash", "balance"]
-        )
+        ))
 
         # 2. money.cash_balance_breakdown
         breakdown_code = """
@@ -109,13 +123,18 @@ user = context.get('user')
 if not user:
     return {'error': 'No user context'}
 
-accounts = Account.objects.filter(user=user)
+# Latest transaction with non-null balance per account, fetched in a single query
+latest = BankTransaction.objects.filter(account=OuterRef('pk'), balance__isnull=False).order_by('-posting_date', '-id')
+accounts = Account.objects.filter(user=user).annotate(
+    latest_balance=Subquery(latest.values('balance')[:1]),
+    latest_tx_id=Subquery(latest.values('id')[:1]),
+    posted_at=Subquery(latest.values('posting_date')[:1]),
+    latest_description=Subquery(latest.values('description')[:1])
+)
 breakdown = []
 total = Decimal('0.00')
 
 for acc in accounts:
-    tx = BankTransaction.objects.filter(account=acc, balance__isnull=False).order_by('-posting_date', '-id').first()
-    
     acc_info = {
         "account_id": acc.id,
         "account_name": acc.name,
@@ -125,14 +144,14 @@ for acc in accounts:
         "description": None
     }
     
-    if tx:
-        bal = Decimal(str(tx.balance))
+    if acc.latest_tx_id is not None:
+        bal = acc.latest_balance
         total += bal
         acc_info.update({
             "latest_balance": float(bal),
-            "latest_transaction_id": tx.id,
-            "posted_at": tx.posting_date.isoformat(),
-            "description": tx.description
+            "latest_transaction_id": acc.latest_tx_id,
+            "posted_at": acc.posted_at.isoformat(),
+            "description": acc.latest_description
         })
     
     breakdown.append(acc_info)
@@ -144,34 +163,26 @@ return {
     "provenance_note": "Derived from latest transaction per account"
 }
 """
-        self._create_fact_with_intent(
+        facts.append(cls._fact_with_intent(
             id="money.cash_balance_breakdown",
             desc="Breakdown of cash balance by account with provenance",
             code=breakdown_code,
             data_type="dict",
             regex_patterns=[r"where did this number come from\??"],
             keywords=["provenance", "breakdown", "source"]
-        )
+        ))
+        cls._bulk_seed_facts(facts)
 
-    def _create_fact_with_intent(self, id: str, desc: str, code: str, data_type: str, regex_patterns: List[str], keywords: List[str]) -> None:
+    @classmethod
+    def _fact_with_intent(cls, id: str, desc: str, code: str, data_type: str, regex_patterns: List[str], keywords: List[str]) -> Dict[str, Any]:
         """
-        Helper to create a fact definition and version with intent.
+        Helper to describe a fact definition and version with intent.
         """
-        defn, _ = FactDefinition.objects.get_or_create(
-            id=id,
-            defaults={'description': desc, 'data_type': data_type}
-        )
-        
-        ver, _ = FactDefinitionVersion.objects.update_or_create(
-            fact_definition=defn,
-            version=1,
-            defaults={'code': code.strip(), 'status': 'approved', 'change_note': 'Level 0 Setup'}
-        )
-        
-        IntentRecognizer.objects.update_or_create(
-            fact_version=ver,
-            defaults={'regex_patterns': regex_patterns, 'keywords': keywords}
-        )
+        return {
+            'definition': FactDefinition(id=id, description=desc, data_type=data_type),
+            'version': {'code': code.strip(), 'status': 'approved', 'change_note': 'Level 0 Setup'},
+            'recognizer': {'regex_patterns': regex_patterns, 'keywords': keywords},
+        }
 
     def test_q1_cash_balance(self) -> None:
         """Test 'What is my current cash balance?'"""
@@ -190,16 +201,14 @@ return {
         # but here we just check the latest instance for the fact.
         
         # Note: The engine uses the fact ID "money.cash_balance"
-        # We need to find the version object first
-        defn = FactDefinition.objects.get(id="money.cash_balance")
-        ver = defn.versions.first()
-        
-        # Find instance
         # Note: context hash depends on user ID, so it should be unique for this user
-        instance = FactInstance.objects.filter(fact_version=ver).latest('computed_at')
+        instance = FactInstance.objects.select_related('fact_version__fact_definition').filter(
+            fact_version__fact_definition_id="money.cash_balance"
+        ).latest('computed_at')
         
-        self.assertEqual(instance.value['cash_balance'], expected_total)
-        self.assertEqual(instance.value['currency'], 'USD')
+        value = instance_value(instance)
+        self.assertEqual(value['cash_balance'], expected_total)
+        self.assertEqual(value['currency'], 'USD')
 
     def test_q2_breakdown(self) -> None:
         """Test 'Where did this number come from?'"""
@@ -214,11 +223,11 @@ return {
         self.assertIn("Savings", response['text'])
         
         # Verify FactInstance structure
-        defn = FactDefinition.objects.get(id="money.cash_balance_breakdown")
-        ver = defn.versions.first()
-        instance = FactInstance.objects.filter(fact_version=ver).latest('computed_at')
+        instance = FactInstance.objects.select_related('fact_version__fact_definition').filter(
+            fact_version__fact_definition_id="money.cash_balance_breakdown"
+        ).latest('computed_at')
         
-        data = instance.value
+        data = instance_value(instance)
         self.assertEqual(data['total_cash_balance'], expected_total)
         self.assertEqual(len(data['accounts']), 2)
         
@@ -7,28 +7,33 @@ class ProvenanceTests(TestCase):
     """
     Tests for provenance tracking in fact resolution.
     """
-    def setUp(self) -> None:
+    @classmethod
+    def setUpTestData(cls) -> None:
         """
         Set up facts with dependencies for testing provenance.
         """
         # Fact A depends on B
-        self.fact_b = FactDefinition.objects.create(id="fact.b", data_type="scalar")
-        self.ver_b = FactDefinitionVersion.objects.create(
-            fact_definition=self.fact_b,
+        cls.fact_b = FactDefinition.objects.create(id="fact.b", data_type="scalar")
+        cls.ver_b = FactDefinitionVersion.objects.create(
+            fact_definition=cls.fact_b,
             version=1,
             status='approved',
             code="def producer(deps, ctx): return 10"
         )
         
-        self.fact_a = FactDefinition.objects.create(id="fact.a", data_type="scalar")
-        self.ver_a = FactDefinitionVersion.objects.create(
-            fact_definition=self.fact_a,
+        cls.fact_a = FactDefinition.objects.create(id="fact.a", data_type="scalar")
+        cls.ver_a = FactDefinitionVersion.objects.create(
+            fact_definition=cls.fact_a,
             version=1,
             status='approved',
             requires=["fact.b"],
             code="def producer(deps, ctx): return deps['fact.b'] * 2"
         )
-        
+
+    def setUp(self) -> None:
+        """
+        Build the registry and a fresh store for each test.
+        """
         self.registry = build_taxonomy()
         self.store = FactStore()
 
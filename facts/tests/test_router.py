@@ -7,27 +7,32 @@ class RouterTests(TestCase):
     """
     Tests for the IntentRouter.
     """
-    def setUp(self) -> None:
+    @classmethod
+    def setUpTestData(cls) -> None:
         """
         Set up a fact, version, and intent recognizer for testing.
         """
         # Create a fact
-        self.fact = FactDefinition.objects.create(id="finance.spending", description="Spending")
-        self.version = FactDefinitionVersion.objects.create(
-            fact_definition=self.fact,
+        cls.fact = FactDefinition.objects.create(id="finance.spending", description="Spending")
+        cls.version = FactDefinitionVersion.objects.create(
+            fact_definition=cls.fact,
             version=1,
             status='approved',
             code="pass"
         )
         
         # Create recognizer
-        self.recognizer = IntentRecognizer.objects.create(
-            fact_version=self.version,
+        cls.recognizer = IntentRecognizer.objects.create(
+            fact_version=cls.version,
             regex_patterns=[r"how much did i spend on (?P<category>\w+)"],
             keywords=["spending", "cost"],
             example_questions=["what is my spending on food?", "how much for groceries?"]
         )
-        
+
+    def setUp(self) -> None:
+        """
+        Build a fresh router for each test.
+        """
         self.router = IntentRouter()
 
     def test_regex_match(self) -> None:
@@ -52,3 +57,73 @@ class RouterTests(TestCase):
         """
         version, context = self.router.route("what is the weather")
         self.assertIsNone(version)
+
+    def test_recognizer_change_reloads(self) -> None:
+        """
+        Test that an existing router picks up recognizer edits without refresh().
+        """
+        self.recognizer.regex_patterns = [r"what did (?P<category>\w+) cost"]
+        self.recognizer.save()
+        version, context = self.router.route("what did coffee cost")
+        self.assertEqual(version, self.version)
+        self.assertEqual(context['category'], 'coffee')
+
+    def test_regex_match_with_clashing_group_names(self) -> None:
+        """
+        Test that patterns sharing a group name still route correctly.
+        """
+        fact = FactDefinition.objects.create(id="finance.income", description="Income")
+        version = FactDefinitionVersion.objects.create(fact_definition=fact, version=1, status='approved', code="pass")
+        IntentRecognizer.objects.create(
+            fact_version=version,
+            regex_patterns=[r"how much did i earn from (?P<category>\w+)"],
+            keywords=[],
+            example_questions=[]
+        )
+        matched, context = self.router.route("how much did i earn from consulting")
+        self.assertEqual(matched, version)
+        self.assertEqual(context['category'], 'consulting')
+
+    def test_recognizer_order_wins_regardless_of_group_names(self) -> None:
+        """
+        Test that the earlier recognizer wins even when a later one matches further left,
+        and that a later recognizer sharing a group name does not change that.
+        """
+        fact = FactDefinition.objects.create(id="finance.budget", description="Budget")
+        version = FactDefinitionVersion.objects.create(fact_definition=fact, version=1, status='approved', code="pass")
+        recognizer = IntentRecognizer.objects.create(
+            fact_version=version,
+            regex_patterns=[r"(?P<verb>so) how much"],
+            keywords=[],
+            example_questions=[]
+        )
+        question = "so how much did i spend on food"
+        self.assertEqual(IntentRouter().route(question), (self.version, {'category': 'food'}))
+
+        recognizer.regex_patterns = [r"(?P<category>so) how much"]
+        recognizer.save()
+        self.assertEqual(IntentRouter().route(question), (self.version, {'category': 'food'}))
+
+    def test_fused_recognizer_patterns(self) -> None:
+        """
+        Test that a recognizer's patterns are fused into one regex that still routes to the matching pattern.
+        """
+        fact = FactDefinition.objects.create(id="finance.income", description="Income")
+        version = FactDefinitionVersion.objects.create(fact_definition=fact, version=1, status='approved', code="pass")
+        recognizer = IntentRecognizer.objects.create(
+            fact_version=version,
+            regex_patterns=[r"what did i earn (?P<period>yesterday)", r"how much did i earn from (?P<category>\w+)"],
+            keywords=[],
+            example_questions=[]
+        )
+        self.assertTrue({'p0', 'p1'} <= set(recognizer.compiled_regex.groupindex))
+        matched, context = self.router.route("how much did i earn from consulting")
+        self.assertEqual(matched, version)
+        self.assertEqual(context, {'category': 'consulting'})
+
+    def test_backreference_patterns_are_not_fused(self) -> None:
+        """
+        Test that patterns with numbered backreferences keep matching one at a time.
+        """
+        recognizer = IntentRecognizer(regex_patterns=[r"(\w+) and \1", r"spend"])
+        self.assertIsNone(recognizer.compiled_regex)
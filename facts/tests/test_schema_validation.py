@@ -1,5 +1,6 @@
+from collections import ChainMap
 from django.test import TestCase
-from facts.schema_validation import validate_schema_definition, validate_context
+from facts.schema_validation import validate_schema_definition, validate_context, _validator_for
 
 class SchemaValidationTests(TestCase):
     """
@@ -40,3 +41,14 @@ class SchemaValidationTests(TestCase):
             
         with self.assertRaises(ValueError):
             validate_context({}, schema)
+
+    def test_validate_context_reuses_validator(self) -> None:
+        """
+        Test that equal schemas share one compiled validator and ChainMap contexts validate as objects.
+        """
+        _validator_for.cache_clear()
+        schema = {"type": "object", "required": ["x"]}
+        validate_context({"x": 1}, schema)
+        validate_context(ChainMap({"x": 2}, {"val": 2}), {"required": ["x"], "type": "object"})
+        self.assertEqual(_validator_for.cache_info().misses, 1)
+        self.assertEqual(_validator_for.cache_info().hits, 1)
@@ -6,23 +6,24 @@ class StructuredDependencyTests(TestCase):
     """
     Tests for structured dependencies with parameter mapping.
     """
-    def setUp(self) -> None:
+    @classmethod
+    def setUpTestData(cls) -> None:
         """
         Set up facts with structured dependencies and parameter mapping.
         """
         # Fact B takes a parameter 'x'
-        self.fact_b = FactDefinition.objects.create(id="fact.b", data_type="scalar")
-        self.ver_b = FactDefinitionVersion.objects.create(
-            fact_definition=self.fact_b,
+        cls.fact_b = FactDefinition.objects.create(id="fact.b", data_type="scalar")
+        cls.ver_b = FactDefinitionVersion.objects.create(
+            fact_definition=cls.fact_b,
             version=1,
             status='approved',
             code="def producer(deps, ctx): return ctx.get('x', 0)"
         )
         
         # Fact A depends on B, mapping context 'val' -> 'x'
-        self.fact_a = FactDefinition.objects.create(id="fact.a", data_type="scalar")
-        self.ver_a = FactDefinitionVersion.objects.create(
-            fact_definition=self.fact_a,
+        cls.fact_a = FactDefinition.objects.create(id="fact.a", data_type="scalar")
+        cls.ver_a = FactDefinitionVersion.objects.create(
+            fact_definition=cls.fact_a,
             version=1,
             status='approved',
             dependencies=[{
@@ -31,7 +32,11 @@ class StructuredDependencyTests(TestCase):
             }],
             code="def producer(deps, ctx): return deps['fact.b']"
         )
-        
+
+    def setUp(self) -> None:
+        """
+        Build the registry and a fresh store for each test.
+        """
         self.registry = build_taxonomy()
         self.store = FactStore()
 
@@ -48,5 +53,5 @@ class StructuredDependencyTests(TestCase):
         # We can check the store for B's instance
         # But we need to know the hash.
         # Instead, let's check dependencies of A
-        dep_instance = instance_a.dependencies.first().dependency_instance
+        dep_instance = instance_a.dependencies.select_related('dependency_instance').first().dependency_instance
         self.assertEqual(dep_instance.context['x'], 5)
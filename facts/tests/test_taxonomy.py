@@ -0,0 +1,313 @@
+import dataclasses
+import threading
+import time
+import unittest
+from collections import ChainMap
+import pandas as pd
+from decimal import Decimal
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from facts.models import FactDefinition, FactDefinitionVersion, FactInstance
+from finance.models import Account
+from facts.taxonomy import (
+    DependencyEdge, FactRegistry, FactSpec, FactStore, build_taxonomy, create_dynamic_producer,
+    get_user_accounts, get_user_account_ids, precompile_versions, resolve_fact, aresolve_fact, instance_value, safe_execute, to_dot, pa
+)
+
+class AsyncResolutionTests(TestCase):
+    """
+    Tests for concurrent (async) fact resolution.
+    """
+    def setUp(self) -> None:
+        """
+        Set up a diamond: D depends on B and C, which both depend on A.
+        """
+        self.calls = []
+
+        def producer(fact_id, fn):
+            def run(deps, ctx):
+                self.calls.append(fact_id)
+                return fn(deps, ctx)
+            return run
+
+        self.registry = FactRegistry()
+        self.registry.register(FactSpec(id="A", kind="computed", data_type="scalar", requires=[], dependencies=[], producer=producer("A", lambda d, c: 1), description=""))
+        self.registry.register(FactSpec(id="B", kind="computed", data_type="scalar", requires=["A"], dependencies=[], producer=producer("B", lambda d, c: d["A"] + 1), description=""))
+        self.registry.register(FactSpec(id="C", kind="computed", data_type="scalar", requires=["A"], dependencies=[], producer=producer("C", lambda d, c: d["A"] + 2), description=""))
+        self.registry.register(FactSpec(id="D", kind="computed", data_type="scalar", requires=["B", "C"], dependencies=[], producer=producer("D", lambda d, c: d["B"] * d["C"]), description=""))
+
+    def test_aresolve_matches_resolve(self) -> None:
+        """
+        Test that async resolution produces the same value as sync resolution.
+        """
+        sync_value = resolve_fact(self.registry, FactStore(), "D", {}).value
+        async_value = async_to_sync(aresolve_fact)(self.registry, FactStore(), "D", {}).value
+        self.assertEqual(sync_value, 6)
+        self.assertEqual(async_value, sync_value)
+
+    def test_aresolve_computes_shared_dependency_once(self) -> None:
+        """
+        Test that a dependency shared by concurrent siblings is only produced once.
+        """
+        async_to_sync(aresolve_fact)(self.registry, FactStore(), "D", {})
+        self.assertEqual(self.calls.count("A"), 1)
+
+    def test_aresolve_overlaps_sibling_producers(self) -> None:
+        """
+        Test that sibling producers run concurrently: each waits for the other at a barrier,
+        which only trips if both are running at once.
+        """
+        both_running = threading.Barrier(2, timeout=5)
+
+        def meet(value):
+            def run(deps, ctx):
+                both_running.wait()
+                return value
+            return run
+
+        registry = FactRegistry()
+        registry.register(FactSpec(id="X", kind="computed", data_type="scalar", requires=[], dependencies=[], producer=meet(1), description=""))
+        registry.register(FactSpec(id="Y", kind="computed", data_type="scalar", requires=[], dependencies=[], producer=meet(2), description=""))
+        registry.register(FactSpec(id="Z", kind="computed", data_type="scalar", requires=["X", "Y"], dependencies=[], producer=lambda d, c: d["X"] + d["Y"], description=""))
+
+        instance = async_to_sync(aresolve_fact)(registry, FactStore(), "Z", {})
+        self.assertEqual((instance.status, instance.value), ('success', 3))
+
+    def test_threaded_resolve_matches_resolve(self) -> None:
+        """
+        Test that resolving siblings on a thread pool produces the same value.
+        """
+        self.assertEqual(resolve_fact(self.registry, FactStore(), "D", {}, max_workers=4).value, 6)
+        self.assertIn("B", self.calls)
+        self.assertIn("C", self.calls)
+
+    def test_threaded_resolve_computes_shared_dependency_once(self) -> None:
+        """
+        Test that concurrent siblings wait on the in-flight shared dependency instead of producing it again.
+        """
+        spec_a = self.registry.spec("A")
+
+        def slow_a(deps, ctx):
+            time.sleep(0.1)
+            return spec_a.producer(deps, ctx)
+
+        self.registry.register(dataclasses.replace(spec_a, producer=slow_a))
+        self.assertEqual(resolve_fact(self.registry, FactStore(), "D", {}, max_workers=4).value, 6)
+        self.assertEqual(self.calls.count("A"), 1)
+
+    def test_resolve_computes_shared_dependency_once(self) -> None:
+        """
+        Test that sync resolution memoizes a dependency reached through two paths.
+        """
+        resolve_fact(self.registry, FactStore(), "D", {})
+        self.assertEqual(self.calls.count("A"), 1)
+
+@unittest.skipIf(pa is None, "pyarrow not installed")
+class DataFrameStorageTests(TestCase):
+    """
+    Tests for Arrow IPC storage of dataframe fact values.
+    """
+    def setUp(self) -> None:
+        """
+        Set up a versioned fact that produces a DataFrame.
+        """
+        defn = FactDefinition.objects.create(id="frame.fact", data_type="dataframe")
+        FactDefinitionVersion.objects.create(
+            fact_definition=defn,
+            version=1,
+            status='approved',
+            code="return pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']})"
+        )
+        self.registry = build_taxonomy()
+
+    def test_dataframe_round_trip(self) -> None:
+        """
+        Test that a DataFrame value is stored as IPC bytes and decoded back.
+        """
+        instance = resolve_fact(self.registry, FactStore(), "frame.fact", {})
+        self.assertIsNone(instance.value)
+        self.assertIsNotNone(instance.value_ipc)
+
+        reloaded = FactInstance.objects.get(pk=instance.pk)
+        pd.testing.assert_frame_equal(instance_value(reloaded), pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']}))
+
+class SafeExecuteTests(TestCase):
+    """
+    Tests for dynamic producer execution.
+    """
+    def test_error_includes_traceback(self) -> None:
+        """
+        Test that failing fact code raises a RuntimeError carrying the original traceback.
+        """
+        producer = create_dynamic_producer("return 1 / 0")
+        with self.assertRaises(RuntimeError) as cm:
+            safe_execute(producer, {}, {})
+        self.assertIn("Error executing fact logic: division by zero", str(cm.exception))
+        self.assertIn("ZeroDivisionError", str(cm.exception))
+
+    def test_evenly_indented_code_runs(self) -> None:
+        """
+        Test that fact code indented as a whole still compiles as a function body.
+        """
+        producer = create_dynamic_producer("    total = 2\n    return total * 3")
+        self.assertEqual(safe_execute(producer, {}, {}), 6)
+
+    def test_global_writes_do_not_leak_between_producers(self) -> None:
+        """
+        Test that a producer declaring a global cannot change the names other producers see.
+        """
+        writer = create_dynamic_producer("global Decimal\nDecimal = None\nreturn 1")
+        safe_execute(writer, {}, {})
+        reader = create_dynamic_producer("return Decimal('1.5')")
+        self.assertEqual(safe_execute(reader, {}, {}), Decimal('1.5'))
+
+    def test_declared_dependencies_bound_as_locals(self) -> None:
+        """
+        Test that identifier-like dependency ids are available as locals and the code is compiled once.
+        """
+        producer = create_dynamic_producer("return all_transactions + deps['fact.b']", ["all_transactions", "fact.b"])
+        self.assertEqual(safe_execute(producer, {"all_transactions": 1, "fact.b": 2}, {}), 3)
+        func = producer.func
+        self.assertEqual(safe_execute(producer, {"all_transactions": 5, "fact.b": 2}, {}), 7)
+        self.assertIs(producer.func, func)
+
+    def test_producer_function_definition(self) -> None:
+        """
+        Test that code defining producer(deps, ctx) is called rather than treated as a body.
+        """
+        producer = create_dynamic_producer("def producer(deps, ctx):\n    return deps['x'] + ctx['y']")
+        self.assertEqual(safe_execute(producer, {"x": 1}, {"y": 2}), 3)
+
+    def test_compiled_code_shared_across_registries(self) -> None:
+        """
+        Test that a version's code is compiled once and reused by later registries until the version is saved.
+        """
+        defn = FactDefinition.objects.create(id="compiled.fact", data_type="scalar")
+        version = FactDefinitionVersion.objects.create(fact_definition=defn, version=1, status='approved', code="return 1")
+        first = build_taxonomy().spec("compiled.fact").producer
+        safe_execute(first, {}, {})
+        second = build_taxonomy().spec("compiled.fact").producer
+        self.assertIs(second.func, first.func)
+
+        version.save()
+        self.assertIsNone(build_taxonomy().spec("compiled.fact").producer.func)
+
+    def test_precompile_versions(self) -> None:
+        """
+        Test that precompiled versions are handed out already compiled, binding their dependencies.
+        """
+        defn = FactDefinition.objects.create(id="precompiled.fact", data_type="scalar")
+        FactDefinitionVersion.objects.create(
+            fact_definition=defn, version=1, status='approved', code="return base + 1", requires=["base"]
+        )
+        precompile_versions(FactDefinitionVersion.objects.filter(fact_definition=defn))
+        producer = build_taxonomy().spec("precompiled.fact").producer
+        self.assertIsNotNone(producer.func)
+        self.assertEqual(safe_execute(producer, {"base": 1}, {}), 2)
+
+class InstanceCacheTests(TestCase):
+    """
+    Tests for the in-process cache in front of persisted fact instances.
+    """
+    def setUp(self) -> None:
+        """
+        Set up a versioned scalar fact.
+        """
+        defn = FactDefinition.objects.create(id="cached.fact", data_type="scalar")
+        self.version = FactDefinitionVersion.objects.create(
+            fact_definition=defn,
+            version=1,
+            status='approved',
+            code="return 42"
+        )
+        self.registry = build_taxonomy()
+
+    def test_repeat_resolution_skips_db(self) -> None:
+        """
+        Test that a fresh store resolving an already-persisted fact issues no queries.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            first = resolve_fact(self.registry, FactStore(), "cached.fact", {})
+        with self.assertNumQueries(0):
+            second = resolve_fact(self.registry, FactStore(), "cached.fact", {})
+        self.assertEqual(second.pk, first.pk)
+
+    def test_uncommitted_instance_not_cached(self) -> None:
+        """
+        Test that instances are only cached in-process after their transaction commits.
+        """
+        resolve_fact(self.registry, FactStore(), "cached.fact", {})
+        with self.assertNumQueries(1):
+            resolve_fact(self.registry, FactStore(), "cached.fact", {})
+
+    def test_version_save_invalidates(self) -> None:
+        """
+        Test that saving the version drops its cached instances.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            resolve_fact(self.registry, FactStore(), "cached.fact", {})
+        self.version.save()
+        with self.assertNumQueries(1):
+            resolve_fact(self.registry, FactStore(), "cached.fact", {})
+
+    def test_expired_instance_recomputed(self) -> None:
+        """
+        Test that an instance older than FACT_INSTANCE_TTL is recomputed and refreshed in place.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            first = resolve_fact(self.registry, FactStore(), "cached.fact", {})
+        FactDefinitionVersion.objects.filter(pk=self.version.pk).update(code="return 43")
+        registry = build_taxonomy()
+        with override_settings(FACT_INSTANCE_TTL=0):
+            second = resolve_fact(registry, FactStore(), "cached.fact", {})
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(second.value, 43)
+        self.assertEqual(FactInstance.objects.get(pk=first.pk).value, 43)
+
+class UserAccountsTests(TestCase):
+    """
+    Tests for the per-question accounts helper available to fact code.
+    """
+    def test_accounts_fetched_once_per_cache(self) -> None:
+        """
+        Test that accounts are queried once per context cache, including through dependency contexts.
+        """
+        user = User.objects.create_user(username='acc_user', password='password')
+        account = Account.objects.create(name='Checking', user=user)
+        context = {'user': user, '_cache': {}}
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_accounts(context), [account])
+            self.assertEqual(get_user_accounts(ChainMap({'date': 'yesterday'}, context)), [account])
+
+    def test_account_ids_share_the_accounts_cache(self) -> None:
+        """
+        Test that account ids come back as a tuple and reuse the cached accounts.
+        """
+        user = User.objects.create_user(username='ids_user', password='password')
+        account = Account.objects.create(name='Checking', user=user)
+        context = {'user': user, '_cache': {}}
+        get_user_accounts(context)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_account_ids(context), (account.id,))
+        self.assertIs(get_user_account_ids(context), context['_cache']['account_ids'])
+
+class ToDotTests(TestCase):
+    """
+    Tests for Graphviz export of the registry.
+    """
+    def test_to_dot(self) -> None:
+        """
+        Test that nodes and both kinds of edges are emitted.
+        """
+        reg = FactRegistry()
+        reg.register(FactSpec(id="A", kind="computed", data_type="scalar", requires=["B"], dependencies=[DependencyEdge(to_fact_id="C")], producer=None, description=""))
+        self.assertEqual(to_dot(reg), "\n".join([
+            "digraph FactTaxonomy {",
+            'rankdir="LR";',
+            'node [shape=box];',
+            '"A" [label="A\\n(computed, scalar)"];',
+            '"B" -> "A";',
+            '"C" -> "A" [label="mapped"];',
+            "}",
+        ]))
@@ -3,14 +3,15 @@ from django.urls import path
 from django.shortcuts import render, redirect
 from django import forms
 from django.contrib import messages
-import csv
+from django.db import transaction
 import io
-from datetime import datetime
+from .importers import BANK_COLUMNS, CREDIT_CARD_COLUMNS, read_import_csv, drop_existing_rows, last_id, build_objects, describe_invalid_rows, read_ahead
 from .models import BankTransaction, CreditCardTransaction, Account
 
 class CsvImportForm(forms.Form):
     csv_file = forms.FileField()
-    account = forms.ModelChoiceField(queryset=Account.objects.all())
+    # Labels only need the name
+    account = forms.ModelChoiceField(queryset=Account.objects.only('id', 'name'))
 
 @admin.register(Account)
 class AccountAdmin(admin.ModelAdmin):
@@ -19,6 +20,7 @@ class AccountAdmin(admin.ModelAdmin):
 @admin.register(BankTransaction)
 class BankTransactionAdmin(admin.ModelAdmin):
     list_display = ('posting_date', 'description', 'amount', 'type', 'balance', 'account')
+    list_select_related = ('account',)
     change_list_template = "admin/bank_transaction_changelist.html"
 
     def get_urls(self):
@@ -34,43 +36,36 @@ class BankTransactionAdmin(admin.ModelAdmin):
             if form.is_valid():
                 csv_file = request.FILES["csv_file"]
                 account = form.cleaned_data["account"]
-                decoded_file = csv_file.read().decode('utf-8')
-                io_string = io.StringIO(decoded_file)
-                reader = csv.reader(io_string)
-                next(reader)  # Skip header
-                
-                for row in reader:
-                    if not row: continue
-                    # Expected format: Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
-                    try:
-                        posting_date = datetime.strptime(row[1], '%m/%d/%Y').date()
-                        amount = float(row[3])
-                        balance = float(row[5]) if row[5].strip() else None
-                        
-                        BankTransaction.objects.create(
-                            account=account,
-                            details=row[0],
-                            posting_date=posting_date,
-                            description=row[2],
-                            amount=amount,
-                            type=row[4],
-                            balance=balance,
-                            check_or_slip_number=row[6] if len(row) > 6 else None
-                        )
-                    except Exception as e:
-                        messages.error(request, f"Error processing row {row}: {e}")
-                        continue
-                
+                # Decode lazily rather than holding the upload as bytes and as str
+                stream = io.TextIOWrapper(csv_file, encoding='utf-8', newline='')
+                account_id = account.pk
+                invalid_rows = []
+                skipped = 0
+                with transaction.atomic():
+                    stored_through = last_id(BankTransaction, account_id)
+                    # A few chunks in memory at most; the next one parses while this one inserts
+                    for df, chunk_invalid in read_ahead(read_import_csv(stream, BANK_COLUMNS, ['posting_date'], ['amount'], ['balance'], model=BankTransaction)):
+                        invalid_rows.extend(chunk_invalid)
+                        new_rows = drop_existing_rows(df, BankTransaction, account_id, 'posting_date', stored_through)
+                        skipped += len(df) - len(new_rows)
+                        objs = build_objects(BankTransaction, new_rows, account_id=account_id)
+                        BankTransaction.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=True)
+                if invalid_rows:
+                    messages.warning(request, describe_invalid_rows(invalid_rows))
+                if skipped:
+                    messages.warning(request, f"Skipped {skipped} rows that were already imported")
                 messages.success(request, "CSV file imported successfully")
                 return redirect("..")
-            
-        form = CsvImportForm()
+        else:
+            form = CsvImportForm()
+        # An invalid POST re-renders its bound form so the field errors show
         payload = {"form": form}
         return render(request, "admin/csv_form.html", payload)
 
 @admin.register(CreditCardTransaction)
 class CreditCardTransactionAdmin(admin.ModelAdmin):
     list_display = ('transaction_date', 'description', 'amount', 'category', 'type', 'account')
+    list_select_related = ('account',)
     change_list_template = "admin/credit_card_transaction_changelist.html"
 
     def get_urls(self):
@@ -86,37 +81,28 @@ class CreditCardTransactionAdmin(admin.ModelAdmin):
             if form.is_valid():
                 csv_file = request.FILES["csv_file"]
                 account = form.cleaned_data["account"]
-                decoded_file = csv_file.read().decode('utf-8')
-                io_string = io.StringIO(decoded_file)
-                reader = csv.reader(io_string)
-                next(reader)  # Skip header
-                
-                for row in reader:
-                    if not row: continue
-                    # Expected format: Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo
-                    try:
-                        transaction_date = datetime.strptime(row[1], '%m/%d/%Y').date()
-                        post_date = datetime.strptime(row[2], '%m/%d/%Y').date()
-                        amount = float(row[6])
-                        
-                        CreditCardTransaction.objects.create(
-                            account=account,
-                            card=row[0],
-                            transaction_date=transaction_date,
-                            post_date=post_date,
-                            description=row[3],
-                            category=row[4],
-                            type=row[5],
-                            amount=amount,
-                            memo=row[7] if len(row) > 7 else None
-                        )
-                    except Exception as e:
-                        messages.error(request, f"Error processing row {row}: {e}")
-                        continue
-                
+                # Decode lazily rather than holding the upload as bytes and as str
+                stream = io.TextIOWrapper(csv_file, encoding='utf-8', newline='')
+                account_id = account.pk
+                invalid_rows = []
+                skipped = 0
+                with transaction.atomic():
+                    stored_through = last_id(CreditCardTransaction, account_id)
+                    # A few chunks in memory at most; the next one parses while this one inserts
+                    for df, chunk_invalid in read_ahead(read_import_csv(stream, CREDIT_CARD_COLUMNS, ['transaction_date', 'post_date'], ['amount'], model=CreditCardTransaction)):
+                        invalid_rows.extend(chunk_invalid)
+                        new_rows = drop_existing_rows(df, CreditCardTransaction, account_id, 'transaction_date', stored_through)
+                        skipped += len(df) - len(new_rows)
+                        objs = build_objects(CreditCardTransaction, new_rows, account_id=account_id)
+                        CreditCardTransaction.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=True)
+                if invalid_rows:
+                    messages.warning(request, describe_invalid_rows(invalid_rows))
+                if skipped:
+                    messages.warning(request, f"Skipped {skipped} rows that were already imported")
                 messages.success(request, "CSV file imported successfully")
                 return redirect("..")
-            
-        form = CsvImportForm()
+        else:
+            form = CsvImportForm()
+        # An invalid POST re-renders its bound form so the field errors show
         payload = {"form": form}
         return render(request, "admin/csv_form.html", payload)
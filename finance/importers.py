@@ -0,0 +1,171 @@
+"""
+CSV parsing helpers shared by the admin upload views and the setup_data command.
+"""
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from django.db import models
+from django.db.models import Max
+
+# Rows parsed and inserted per step, so imports hold a bounded slice of a statement in memory
+IMPORT_CHUNK_SIZE = 10_000
+
+BANK_COLUMNS = ['details', 'posting_date', 'description', 'amount', 'type', 'balance', 'check_or_slip_number']
+CREDIT_CARD_COLUMNS = ['card', 'transaction_date', 'post_date', 'description', 'category', 'type', 'amount', 'memo']
+
+def read_import_csv(stream, columns, date_columns, number_columns, optional_number_columns=(), model=None):
+    """
+    Parses a CSV text stream vectorized, IMPORT_CHUNK_SIZE rows at a time.
+    Yields, per chunk, the frame of valid rows (dates as date objects, numbers as floats,
+    blank optional numbers as None) and the 1-based data row numbers whose dates or numbers could not be parsed.
+    With a model, rows whose text exceeds a field's max_length or whose number exceeds its
+    max_digits are reported the same way, rather than failing the INSERT for the whole upload.
+    """
+    limits = field_limits(model, columns) if model is not None else ({}, {})
+    for chunk in pd.read_csv(stream, header=None, skiprows=1, names=columns, usecols=range(len(columns)),
+                             dtype=str, keep_default_na=False, chunksize=IMPORT_CHUNK_SIZE):
+        yield _parse_chunk(chunk, date_columns, number_columns, optional_number_columns, *limits)
+
+def field_limits(model, columns):
+    """
+    Returns ({column: max_length}, {column: (exclusive absolute bound, decimal_places)}) for
+    the model's CharFields and DecimalFields among `columns`.
+    """
+    max_lengths = {}
+    max_numbers = {}
+    for col in columns:
+        field = model._meta.get_field(col)
+        if isinstance(field, models.DecimalField):
+            max_numbers[col] = (10 ** (field.max_digits - field.decimal_places), field.decimal_places)
+        elif isinstance(field, models.CharField) and field.max_length is not None:
+            max_lengths[col] = field.max_length
+    return max_lengths, max_numbers
+
+def _parse_chunk(df, date_columns, number_columns, optional_number_columns, max_lengths=None, max_numbers=None):
+    """
+    Converts one chunk of raw string columns and masks out the rows that fail to parse
+    or do not fit their database columns.
+    """
+    invalid = pd.Series(False, index=df.index)
+    parsed = {}
+    for col in date_columns:
+        # Exports repeat the same few dates across many rows, so cache the conversions
+        parsed[col] = pd.to_datetime(df[col], format='%m/%d/%Y', errors='coerce', cache=True)
+        invalid |= parsed[col].isna()
+    for col in number_columns:
+        parsed[col] = pd.to_numeric(df[col], errors='coerce')
+        invalid |= parsed[col].isna()
+    for col in optional_number_columns:
+        raw = df[col].str.strip()
+        parsed[col] = pd.to_numeric(raw.where(raw != ''), errors='coerce')
+        invalid |= parsed[col].isna() & (raw != '')
+    for col, max_length in (max_lengths or {}).items():
+        invalid |= df[col].str.len() > max_length
+    for col, (bound, places) in (max_numbers or {}).items():
+        # NaN compares False, so blank optional numbers pass; inf does not
+        invalid |= parsed[col].round(places).abs() >= bound
+
+    # The index runs on across chunks, so it numbers rows within the whole file
+    invalid_rows = (df.index[invalid] + 1).tolist()
+    valid = ~invalid
+    df = df[valid].copy()
+    for col in date_columns:
+        df[col] = parsed[col][valid].dt.date
+    for col in number_columns:
+        df[col] = parsed[col][valid]
+    for col in optional_number_columns:
+        df[col] = parsed[col][valid].astype(object).where(parsed[col][valid].notna(), None)
+    return df, invalid_rows
+
+def describe_invalid_rows(rows, limit=10):
+    """
+    Summarizes skipped rows in one message instead of one message per row.
+    """
+    shown = ', '.join(str(r) for r in rows[:limit])
+    more = ', ...' if len(rows) > limit else ''
+    return f"Skipped {len(rows)} rows with an invalid or out-of-range value (data rows {shown}{more})"
+
+def drop_existing_rows(df, model, account_id, date_column, stored_through=None):
+    """
+    Removes rows the account already holds, matched on (date, description, amount),
+    using a single query over the dates present in the upload.
+    Each stored row cancels at most one uploaded row, so identical same-day rows
+    (two equal coffees) are all kept unless they were imported before.
+    Pass the account's highest id from before the upload as `stored_through` so rows
+    this upload inserted from earlier chunks are not mistaken for old ones.
+    """
+    if df.empty:
+        return df
+    stored = model.objects.filter(account_id=account_id, **{f'{date_column}__in': set(df[date_column])})
+    if stored_through is not None:
+        stored = stored.filter(id__lte=stored_through)
+    # Amounts are compared as integer cents, so no row pays for a Decimal(str(float)) round-trip
+    existing = Counter(
+        (day, description, int(amount * 100))
+        for day, description, amount in stored.values_list(date_column, 'description', 'amount')
+    )
+    if not existing:
+        return df
+    cents = (df['amount'] * 100).round().astype('int64').tolist()
+    keep = []
+    for key in zip(df[date_column].tolist(), df['description'].tolist(), cents):
+        stored = existing[key] > 0
+        if stored:
+            existing[key] -= 1
+        keep.append(not stored)
+    return df[keep]
+
+def last_id(model, account_id):
+    """
+    The account's highest row id before an upload starts (0 when it holds none).
+    """
+    return model.objects.filter(account_id=account_id).aggregate(last=Max('id'))['last'] or 0
+
+def build_objects(model, df, **fields):
+    """
+    Builds unsaved model instances from a parsed frame, walking plain column lists
+    rather than boxing every cell through itertuples().
+    """
+    columns = list(df.columns)
+    return [model(**fields, **dict(zip(columns, values))) for values in zip(*(df[col].tolist() for col in columns))]
+
+def read_ahead(iterable, depth=2):
+    """
+    Runs an iterator on a background thread, keeping up to `depth` items ready,
+    so parsing the next chunk overlaps with inserting the current one.
+    Errors raised while producing are re-raised to the consumer.
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    return
+                items.put((True, item))
+        except BaseException as exc:
+            items.put((False, exc))
+        else:
+            items.put((False, None))
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(produce)
+        try:
+            while True:
+                ok, value = items.get()
+                if not ok:
+                    if value is not None:
+                        raise value
+                    return
+                yield value
+        finally:
+            stop.set()
+            # Unblock a producer still waiting on a full queue
+            while True:
+                try:
+                    items.get_nowait()
+                except queue.Empty:
+                    break
@@ -1,19 +1,26 @@
 import os
 import csv
-from datetime import datetime, date, timedelta
+import io
 from typing import Any, Dict, List, Optional, Tuple
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from finance.importers import BANK_COLUMNS, CREDIT_CARD_COLUMNS, read_import_csv, read_ahead, describe_invalid_rows
 from finance.models import Account, BankTransaction, CreditCardTransaction
 from facts.engine import QAEngine
 from facts.models import FactDefinition, FactDefinitionVersion, IntentRecognizer
-import pandas as pd
-from django.db.models import Sum
-from decimal import Decimal
+from facts.router import invalidate_recognizers
+from facts.taxonomy import invalidate_code_cache, invalidate_instance_cache, precompile_versions
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+from django.db import connection, transaction
+from django.utils import timezone
 
 class Command(BaseCommand):
     help = 'Sets up initial data: users, accounts, transactions, and facts.'
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._pending_facts = []
+
     def handle(self, *args: Any, **options: Any) -> None:
         admin_user = self.create_superuser()
         bank_account, credit_card_account = self.create_accounts(admin_user)
@@ -35,6 +42,8 @@ class Command(BaseCommand):
         self.setup_initial_facts()
         self.setup_level0_facts()
         self.setup_level1_facts()
+        # After every save above, since saving a version drops its compiled code
+        precompile_versions(FactDefinitionVersion.objects.filter(status='approved'))
         self.run_initial_questions(admin_user)
 
     def create_superuser(self) -> User:
@@ -50,90 +59,109 @@ class Command(BaseCommand):
         return user
 
     def create_accounts(self, user: User) -> Tuple[Account, Account]:
-        bank_account, created = Account.objects.get_or_create(name='Chase Checking', defaults={'user': user})
-        if created:
-            self.stdout.write(f"Account '{bank_account.name}' created.")
-        else:
-            if not bank_account.user:
-                bank_account.user = user
-                bank_account.save()
-            self.stdout.write(f"Account '{bank_account.name}' already exists.")
-
-        credit_card_account, created = Account.objects.get_or_create(name='Chase Credit Card', defaults={'user': user})
-        if created:
-            self.stdout.write(f"Account '{credit_card_account.name}' created.")
-        else:
-            if not credit_card_account.user:
-                credit_card_account.user = user
-                credit_card_account.save()
-            self.stdout.write(f"Account '{credit_card_account.name}' already exists.")
-        
-        return bank_account, credit_card_account
+        names = ('Chase Checking', 'Chase Credit Card')
+        # One lookup for both accounts, then at most one INSERT and one UPDATE
+        accounts = {a.name: a for a in Account.objects.filter(name__in=names)}
+        missing = [Account(name=name, user=user) for name in names if name not in accounts]
+        Account.objects.bulk_create(missing)
+        created = {a.name for a in missing}
+        for account in missing:
+            accounts[account.name] = account
+            self.stdout.write(f"Account '{account.name}' created.")
+
+        unowned = [a for a in accounts.values() if a.user_id is None]
+        if unowned:
+            Account.objects.filter(pk__in=[a.pk for a in unowned]).update(user=user)
+            for account in unowned:
+                account.user = user
+        for name in names:
+            if name not in created:
+                self.stdout.write(f"Account '{name}' already exists.")
+
+        return accounts['Chase Checking'], accounts['Chase Credit Card']
 
     def import_bank_transactions(self, account: Account, csv_path: str) -> None:
-        if BankTransaction.objects.filter(account=account).exists():
+        if account.imported_bank_at is None and BankTransaction.objects.filter(account=account).exists():
+            # Loaded before the marker existed; record it so later runs skip the probe
+            self._mark_imported(account, 'imported_bank_at')
+        if account.imported_bank_at is not None:
             self.stdout.write(f"Bank transactions for {account.name} already exist. Skipping import.")
             return
 
         self.stdout.write(f"Importing bank transactions from {csv_path}...")
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            next(reader)  # Skip header
-            count = 0
-            for row in reader:
-                if not row: continue
-                try:
-                    posting_date = datetime.strptime(row[1], '%m/%d/%Y').date()
-                    amount = float(row[3])
-                    balance = float(row[5]) if row[5].strip() else None
-                    
-                    BankTransaction.objects.create(
-                        account=account,
-                        details=row[0],
-                        posting_date=posting_date,
-                        description=row[2],
-                        amount=amount,
-                        type=row[4],
-                        balance=balance,
-                        check_or_slip_number=row[6] if len(row) > 6 else None
-                    )
-                    count += 1
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"Error processing row {row}: {e}"))
-            self.stdout.write(self.style.SUCCESS(f"Imported {count} bank transactions."))
+        imported = 0
+        invalid_rows = []
+        # Chunks are parsed on a background thread and flushed here inside a single transaction
+        with open(csv_path, 'r', encoding='utf-8', newline='', buffering=1 << 20) as f, transaction.atomic():
+            for df, chunk_invalid in read_ahead(read_import_csv(f, BANK_COLUMNS, ['posting_date'], ['amount'], ['balance'], model=BankTransaction)):
+                invalid_rows.extend(chunk_invalid)
+                rows = df.assign(account_id=account.pk).to_dict('records')
+                self._insert_rows(BankTransaction, rows)
+                imported += len(rows)
+            self._mark_imported(account, 'imported_bank_at')
+        if invalid_rows:
+            self.stdout.write(self.style.ERROR(describe_invalid_rows(invalid_rows)))
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} bank transactions."))
 
     def import_credit_card_transactions(self, account: Account, csv_path: str) -> None:
-        if CreditCardTransaction.objects.filter(account=account).exists():
+        if account.imported_credit_card_at is None and CreditCardTransaction.objects.filter(account=account).exists():
+            # Loaded before the marker existed; record it so later runs skip the probe
+            self._mark_imported(account, 'imported_credit_card_at')
+        if account.imported_credit_card_at is not None:
             self.stdout.write(f"Credit card transactions for {account.name} already exist. Skipping import.")
             return
 
         self.stdout.write(f"Importing credit card transactions from {csv_path}...")
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            next(reader)  # Skip header
-            count = 0
-            for row in reader:
-                if not row: continue
-                try:
-                    transaction_date = datetime.strptime(row[1], '%m/%d/%Y').date()
-                    post_date = datetime.strptime(row[2], '%m/%d/%Y').date()
-                    amount = float(row[6])
-                    
-                    CreditCardTransaction.objects.create(
-                        account=account,
-                        card=row[0],
-                        transaction_date=transaction_date,
-                        post_date=post_date,
-                        description=row[3],
-                        category=row[4],
-                        type=row[5],
-                        amount=amount,
-                        memo=row[7] if len(row) > 7 else None
-                    )
-                    count += 1
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"Error processing row {row}: {e}"))
-            self.stdout.write(self.style.SUCCESS(f"Imported {count} credit card transactions."))
+        imported = 0
+        invalid_rows = []
+        with open(csv_path, 'r', encoding='utf-8', newline='', buffering=1 << 20) as f, transaction.atomic():
+            for df, chunk_invalid in read_ahead(read_import_csv(f, CREDIT_CARD_COLUMNS, ['transaction_date', 'post_date'], ['amount'], model=CreditCardTransaction)):
+                invalid_rows.extend(chunk_invalid)
+                rows = df.assign(account_id=account.pk).to_dict('records')
+                self._insert_rows(CreditCardTransaction, rows)
+                imported += len(rows)
+            self._mark_imported(account, 'imported_credit_card_at')
+        if invalid_rows:
+            self.stdout.write(self.style.ERROR(describe_invalid_rows(invalid_rows)))
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} credit card transactions."))
+
+    def _mark_imported(self, account: Account, field: str) -> None:
+        """
+        Records that the account's seed statement has been loaded.
+        """
+        setattr(account, field, timezone.now())
+        account.save(update_fields=[field])
+
+    def _insert_rows(self, model: Any, rows: List[Dict[str, Any]]) -> None:
+        """
+        Inserts parsed rows (field attname -> value): COPY on PostgreSQL, bulk_create elsewhere.
+        """
+        if not rows:
+            return
+        if connection.vendor != 'postgresql':
+            model.objects.bulk_create([model(**row) for row in rows], batch_size=1000)
+            return
+
+        # COPY skips model construction, parameter binding and INSERT parsing entirely
+        columns = list(rows[0])
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in rows:
+            writer.writerow(['\\N' if row[c] is None else row[c] for c in columns])
+        buf.seek(0)
+
+        qn = connection.ops.quote_name
+        sql = (
+            f"COPY {qn(model._meta.db_table)} ({', '.join(qn(model._meta.get_field(c).column) for c in columns)}) "
+            "FROM STDIN WITH (FORMAT CSV, NULL '\\N')"
+        )
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy_expert'):  # psycopg2
+                raw.copy_expert(sql, buf)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buf.getvalue())
 
     def setup_initial_facts(self) -> None:
         self.stdout.write("Setting up initial dynamic facts...")
@@ -172,10 +200,10 @@ if user:
 if account_name:
     qs = qs.filter(account__name=account_name)
     
-latest_tx = qs.order_by('-posting_date').first()
+latest_balance = qs.order_by('-posting_date').values_list('balance', flat=True).first()
     
-if latest_tx:
-    return float(latest_tx.balance)
+if latest_balance is not None:
+    return float(latest_balance)
 return 0.0
 """
             },
@@ -191,11 +219,13 @@ if isinstance(df, list):
     
 if df.empty:
     return {}
-# Filter for negative amounts (spending)
-spending = df[df['amount'] < 0]
+# Filter for negative amounts (spending); a NumPy mask skips index alignment
+spending = df.loc[df['amount'].to_numpy() < 0]
 if spending.empty:
     return {}
-return spending.groupby('category')['amount'].sum().abs().to_dict()
+# Grouping on categorical codes avoids hashing every category string
+categories = spending['category'].astype('category')
+return spending['amount'].groupby(categories, observed=True).sum().abs().to_dict()
 """
             },
             {
@@ -228,31 +258,48 @@ return abs(spent)
             }
         ]
         
-        for f in facts:
-            defn, _ = FactDefinition.objects.get_or_create(
-                id=f['id'],
-                defaults={
-                    'description': f['description'],
-                    'data_type': f['data_type'],
-                    'is_active': True
-                }
+        # One lookup per table instead of a get_or_create and versions query per fact
+        ids = [f['id'] for f in facts]
+        existing_ids = set(FactDefinition.objects.filter(id__in=ids).values_list('id', flat=True))
+        new_definitions = [
+            FactDefinition(id=f['id'], description=f['description'], data_type=f['data_type'], is_active=True)
+            for f in facts if f['id'] not in existing_ids
+        ]
+        if new_definitions:
+            bulk_create_with_history(new_definitions, FactDefinition)
+
+        latest_versions = {}
+        for v in FactDefinitionVersion.objects.filter(fact_definition_id__in=ids):  # newest first
+            latest_versions.setdefault(v.fact_definition_id, v)
+
+        # Create version if not exists
+        new_versions = [
+            FactDefinitionVersion(
+                fact_definition_id=f['id'],
+                version=1,
+                requires=f['requires'],
+                code=f['code'].strip(),
+                status='approved',
+                change_note="Initial setup"
             )
-            
-            # Create version if not exists
-            if not defn.versions.exists():
-                FactDefinitionVersion.objects.create(
-                    fact_definition=defn,
-                    version=1,
-                    requires=f['requires'],
-                    code=f['code'].strip(),
-                    status='approved',
-                    change_note="Initial setup"
-                )
-            else:
-                # Update existing version code for development iteration
-                v = defn.versions.first()
+            for f in facts if f['id'] not in latest_versions
+        ]
+        if new_versions:
+            bulk_create_with_history(new_versions, FactDefinitionVersion)
+
+        # Update existing version code for development iteration
+        changed = []
+        for f in facts:
+            v = latest_versions.get(f['id'])
+            if v is not None and v.code != f['code'].strip():
                 v.code = f['code'].strip()
-                v.save()
+                changed.append(v)
+        if changed:
+            bulk_update_with_history(changed, FactDefinitionVersion, ['code'])
+            # bulk_update skips the post_save signal that normally drops cached code and instances
+            for v in changed:
+                invalidate_instance_cache(version_id=v.pk)
+                invalidate_code_cache(version_id=v.pk)
 
         self.stdout.write(self.style.SUCCESS(f"Ensured {len(facts)} initial facts exist."))
 
@@ -265,15 +312,17 @@ user = context.get('user')
 if not user:
     return {'error': 'No user context'}
 
-accounts = Account.objects.filter(user=user)
-total = Decimal('0.00')
-
-for acc in accounts:
-    # Get latest transaction with non-null balance
-    tx = BankTransaction.objects.filter(account=acc, balance__isnull=False).order_by('-posting_date', '-id').first()
-    if tx:
-        # balance is float in DB, convert to string first for Decimal safety
-        total += Decimal(str(tx.balance))
+# Sum the latest transaction with non-null balance per account in the DB
+latest_id = BankTransaction.objects.filter(
+    account=OuterRef('account'),
+    balance__isnull=False
+).order_by('-posting_date', '-id').values('id')[:1]
+agg = BankTransaction.objects.filter(
+    account__user=user,
+    balance__isnull=False,
+    id=Subquery(latest_id)
+).aggregate(total=Sum('balance'))
+total = agg['total'] or Decimal('0.00')
 
 return {
     "cash_balance": float(total),
@@ -295,13 +344,18 @@ user = context.get('user')
 if not user:
     return {'error': 'No user context'}
 
-accounts = Account.objects.filter(user=user)
+# Latest transaction with non-null balance per account, fetched in a single query
+latest = BankTransaction.objects.filter(account=OuterRef('pk'), balance__isnull=False).order_by('-posting_date', '-id')
+accounts = Account.objects.filter(user=user).annotate(
+    latest_balance=Subquery(latest.values('balance')[:1]),
+    latest_tx_id=Subquery(latest.values('id')[:1]),
+    posted_at=Subquery(latest.values('posting_date')[:1]),
+    latest_description=Subquery(latest.values('description')[:1])
+)
 breakdown = []
 total = Decimal('0.00')
 
 for acc in accounts:
-    tx = BankTransaction.objects.filter(account=acc, balance__isnull=False).order_by('-posting_date', '-id').first()
-    
     acc_info = {
         "account_id": acc.id,
         "account_name": acc.name,
@@ -311,14 +365,14 @@ for acc in accounts:
         "description": None
     }
     
-    if tx:
-        bal = Decimal(str(tx.balance))
+    if acc.latest_tx_id is not None:
+        bal = acc.latest_balance
         total += bal
         acc_info.update({
             "latest_balance": float(bal),
-            "latest_transaction_id": tx.id,
-            "posted_at": tx.posting_date.isoformat(),
-            "description": tx.description
+            "latest_transaction_id": acc.latest_tx_id,
+            "posted_at": acc.posted_at.isoformat(),
+            "description": acc.latest_description
         })
     
     breakdown.append(acc_info)
@@ -338,6 +392,7 @@ return {
             regex_patterns=[r"where did this number come from\??"],
             keywords=["provenance", "breakdown", "source"]
         )
+        self._save_pending_facts()
 
     def setup_level1_facts(self) -> None:
         self.stdout.write("Setting up Level 1 Facts & Intents...")
@@ -348,7 +403,7 @@ target_date_str = context.get('date')
 target_date = None
 
 if target_date_str == 'yesterday':
-    target_date = date.today() - timedelta(days=1)
+    target_date = (context.get('today') or date.today()) - timedelta(days=1)
 elif target_date_str:
     try:
         target_date = datetime.strptime(target_date_str, '%Y-%m-%d').date()
@@ -358,20 +413,20 @@ elif target_date_str:
 if not target_date:
     return {"error": "Invalid date"}
 
-user = context.get('user')
-accounts = Account.objects.filter(user=user)
+# Account ids are fetched once per question and shared by dependent facts
+account_ids = get_user_account_ids(context)
 total = Decimal('0.00')
 
-for acc in accounts:
-    # Find latest transaction on or before target_date
-    tx = BankTransaction.objects.filter(
-        account=acc, 
+for acc_id in account_ids:
+    # Find latest balance on or before target_date
+    balance = BankTransaction.objects.filter(
+        account_id=acc_id,
         posting_date__lte=target_date,
         balance__isnull=False
-    ).order_by('-posting_date', '-id').first()
+    ).order_by('-posting_date', '-id').values_list('balance', flat=True).first()
     
-    if tx:
-        total += Decimal(str(tx.balance))
+    if balance is not None:
+        total += balance
 
 return {
     "date": target_date.isoformat(),
@@ -390,15 +445,15 @@ return {
 
         # 2. money.next_paycheck
         code_next_paycheck = """
-user = context.get('user')
-accounts = Account.objects.filter(user=user)
+# Account ids are fetched once per question and shared by dependent facts
+account_ids = get_user_account_ids(context)
 
 # Find latest payroll
 latest_pay = BankTransaction.objects.filter(
-    account__in=accounts,
+    account_id__in=account_ids,
     amount__gt=0,
     description__icontains='Payroll'
-).order_by('-posting_date').first()
+).only('posting_date', 'amount').order_by('-posting_date').first()
 
 if not latest_pay:
     return None
@@ -406,7 +461,7 @@ if not latest_pay:
 # Assume bi-weekly for MVP
 last_date = latest_pay.posting_date
 next_date = last_date + timedelta(days=14)
-days_until = (next_date - date.today()).days
+days_until = (next_date - (context.get('today') or date.today())).days
 
 return {
     "next_paycheck_date": next_date.isoformat(),
@@ -426,25 +481,31 @@ return {
         # 3. money.obligations (Inferred Bills)
         code_obligations = """
 # Simple heuristic: Look for specific keywords in past 60 days
-keywords = {'Rent': 30, 'Electric': 30, 'Netflix': 30, 'Internet': 30}
-user = context.get('user')
-accounts = Account.objects.filter(user=user)
+# Billing period per keyword, built once rather than per matched bill
+monthly = timedelta(days=30)
+keywords = {'Rent': monthly, 'Electric': monthly, 'Netflix': monthly, 'Internet': monthly}
+# Account ids are fetched once per question and shared by dependent facts
+account_ids = get_user_account_ids(context)
 
 obligations = []
-today = date.today()
+today = context.get('today') or date.today()
+
+outflows = BankTransaction.objects.filter(account_id__in=account_ids, amount__lt=0)
+# Tag each row with its keyword in SQL; rows come back grouped by keyword, newest first
+matched_kw = Case(*[When(description__icontains=kw, then=Value(kw)) for kw in keywords], default=None)
+rows = outflows.annotate(kw=matched_kw).filter(kw__isnull=False).order_by('kw', '-posting_date').values('kw', 'posting_date', 'amount')
+
+# Keep the newest occurrence per keyword
+latest = {}
+for row in rows:
+    latest.setdefault(row['kw'], row)
 
 for kw, period in keywords.items():
-    # Find last occurrence
-    tx = BankTransaction.objects.filter(
-        account__in=accounts,
-        description__icontains=kw,
-        amount__lt=0
-    ).order_by('-posting_date').first()
-    
+    tx = latest.get(kw)
     if tx:
         # Project next date
         # If paid on day X, next is X + period
-        next_due = tx.posting_date + timedelta(days=period)
+        next_due = tx['posting_date'] + period
         if next_due < today:
              # If overdue, maybe it's due today or we missed it. 
              # For simplicity, let's say it's due today if calculated in past
@@ -452,7 +513,7 @@ for kw, period in keywords.items():
              
         obligations.append({
             "name": kw,
-            "amount": abs(float(tx.amount)),
+            "amount": abs(float(tx['amount'])),
             "due_date": next_due.isoformat()
         })
 
@@ -476,7 +537,7 @@ if not paycheck:
     return []
 
 cutoff = datetime.strptime(paycheck['next_paycheck_date'], '%Y-%m-%d').date()
-today = date.today()
+today = context.get('today') or date.today()
 
 due = []
 for ob in all_obligations:
@@ -523,17 +584,15 @@ start_date_str = context.get('start_date')
 end_date_str = context.get('end_date')
 period = context.get('period') # yesterday, last_week, last_month
 
-today = date.today()
+today = context.get('today') or date.today()
 start_date = None
 end_date = today
+period_deltas = {'yesterday': timedelta(days=1), 'last_week': timedelta(days=7), 'last_month': timedelta(days=30)}
 
-if period == 'yesterday':
-    start_date = today - timedelta(days=1)
-    end_date = start_date
-elif period == 'last_week':
-    start_date = today - timedelta(days=7)
-elif period == 'last_month':
-    start_date = today - timedelta(days=30)
+if period in period_deltas:
+    start_date = today - period_deltas[period]
+    if period == 'yesterday':
+        end_date = start_date
 elif start_date_str:
     try:
         start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
@@ -545,49 +604,44 @@ elif start_date_str:
 if not start_date:
     return {"error": "Invalid date range"}
 
-accounts = Account.objects.filter(user=user)
-total_spent = Decimal('0.00')
-txs = []
+# Account ids are fetched once per question and shared by dependent facts
+account_ids = get_user_account_ids(context)
+# Totals are summed by the database; only the most recent rows are listed
+limit = 100
 
 # Bank Transactions (Outflows)
 bank_txs = BankTransaction.objects.filter(
-    account__in=accounts,
+    account_id__in=account_ids,
     posting_date__gte=start_date,
     posting_date__lte=end_date,
     amount__lt=0
 )
 
-for tx in bank_txs:
-    total_spent += abs(tx.amount)
-    txs.append({
-        "date": tx.posting_date.isoformat(),
-        "description": tx.description,
-        "amount": float(abs(tx.amount)),
-        "source": "Bank"
-    })
-
 # Credit Card Transactions (Outflows/Purchases)
 cc_txs = CreditCardTransaction.objects.filter(
-    account__in=accounts,
+    account_id__in=account_ids,
     transaction_date__gte=start_date,
     transaction_date__lte=end_date,
     amount__gt=0 # CC positive is usually charge, but let's check model. Usually positive amount is charge.
 )
 
-for tx in cc_txs:
-    total_spent += tx.amount
-    txs.append({
-        "date": tx.transaction_date.isoformat(),
-        "description": tx.description,
-        "amount": float(tx.amount),
-        "source": "Credit Card"
-    })
+bank_total = bank_txs.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+cc_total = cc_txs.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+total_spent = abs(bank_total) + cc_total
+
+txs = [
+    {"date": tx['posting_date'].isoformat(), "description": tx['description'], "amount": float(abs(tx['amount'])), "source": "Bank"}
+    for tx in bank_txs.order_by('-posting_date').values('posting_date', 'description', 'amount')[:limit]
+] + [
+    {"date": tx['transaction_date'].isoformat(), "description": tx['description'], "amount": float(tx['amount']), "source": "Credit Card"}
+    for tx in cc_txs.order_by('-transaction_date').values('transaction_date', 'description', 'amount')[:limit]
+]
 
 return {
     "total_spent": float(total_spent),
     "currency": "USD",
     "period": period or f"{start_date} to {end_date}",
-    "transactions": sorted(txs, key=lambda x: x['date'], reverse=True)
+    "transactions": sorted(txs, key=lambda x: x['date'], reverse=True)[:limit]
 }
 """
         self._create_fact_with_intent(
@@ -609,33 +663,31 @@ days = context.get('days', 30)
 if isinstance(days, str) and days.isdigit():
     days = int(days)
 
-today = date.today()
+today = context.get('today') or date.today()
 start_date = today - timedelta(days=days)
 
-accounts = Account.objects.filter(user=user)
-total_income = Decimal('0.00')
-txs = []
+# Account ids are fetched once per question and shared by dependent facts
+account_ids = get_user_account_ids(context)
 
 # Bank Transactions (Inflows)
 bank_txs = BankTransaction.objects.filter(
-    account__in=accounts,
+    account_id__in=account_ids,
     posting_date__gte=start_date,
     amount__gt=0
 )
 
-for tx in bank_txs:
-    total_income += tx.amount
-    txs.append({
-        "date": tx.posting_date.isoformat(),
-        "description": tx.description,
-        "amount": float(tx.amount)
-    })
+# Summed by the database; only the most recent rows are listed
+total_income = bank_txs.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+txs = [
+    {"date": tx['posting_date'].isoformat(), "description": tx['description'], "amount": float(tx['amount'])}
+    for tx in bank_txs.order_by('-posting_date').values('posting_date', 'description', 'amount')[:100]
+]
 
 return {
     "total_income": float(total_income),
     "currency": "USD",
     "period": f"Last {days} days",
-    "transactions": sorted(txs, key=lambda x: x['date'], reverse=True)
+    "transactions": txs
 }
 """
         self._create_fact_with_intent(
@@ -663,28 +715,96 @@ return "This question cannot be answered yet because merchant information does n
             ],
             keywords=["merchant", "amazon", "starbucks", "spend at"]
         )
+        self._save_pending_facts()
 
     def _create_fact_with_intent(self, id: str, desc: str, code: str, data_type: str, regex_patterns: List[str], keywords: List[str], requires: Optional[List[str]] = None) -> None:
-        defn, _ = FactDefinition.objects.get_or_create(
-            id=id,
-            defaults={'description': desc, 'data_type': data_type}
-        )
-        
-        ver, _ = FactDefinitionVersion.objects.update_or_create(
-            fact_definition=defn,
-            version=1,
-            defaults={
-                'code': code.strip(), 
-                'status': 'approved', 
-                'change_note': 'Setup',
-                'requires': requires or []
-            }
-        )
-        
-        IntentRecognizer.objects.update_or_create(
-            fact_version=ver,
-            defaults={'regex_patterns': regex_patterns, 'keywords': keywords}
+        # Queued and written together by _save_pending_facts() at the end of each setup_level*_facts
+        self._pending_facts.append({
+            'id': id,
+            'description': desc,
+            'data_type': data_type,
+            'code': code.strip(),
+            'requires': requires or [],
+            'regex_patterns': regex_patterns,
+            'keywords': keywords,
+        })
+
+    def _save_pending_facts(self) -> None:
+        specs, self._pending_facts = self._pending_facts, []
+        if not specs:
+            return
+
+        # Re-runs usually change nothing: one read confirms that and skips every write
+        ids = [f['id'] for f in specs]
+        current = {
+            v.fact_definition_id: v
+            for v in FactDefinitionVersion.objects.filter(fact_definition_id__in=ids, version=1).select_related('recognizer')
+        }
+
+        def unchanged(f: Dict[str, Any]) -> bool:
+            v = current.get(f['id'])
+            return (
+                v is not None
+                and v.code == f['code']
+                and v.status == 'approved'
+                and v.requires == f['requires']
+                and hasattr(v, 'recognizer')
+                and v.recognizer.regex_patterns == f['regex_patterns']
+                and v.recognizer.keywords == f['keywords']
+            )
+
+        specs = [f for f in specs if not unchanged(f)]
+        if not specs:
+            return
+
+        existing_ids = set(FactDefinition.objects.filter(id__in=[f['id'] for f in specs]).values_list('id', flat=True))
+        new_definitions = [
+            FactDefinition(id=f['id'], description=f['description'], data_type=f['data_type'])
+            for f in specs if f['id'] not in existing_ids
+        ]
+        if new_definitions:
+            bulk_create_with_history(new_definitions, FactDefinition)
+
+        new_versions = [
+            FactDefinitionVersion(
+                fact_definition_id=f['id'],
+                version=1,
+                code=f['code'],
+                status='approved',
+                change_note='Setup',
+                requires=f['requires']
+            )
+            for f in specs if f['id'] not in current
+        ]
+        if new_versions:
+            bulk_create_with_history(new_versions, FactDefinitionVersion)
+
+        changed = []
+        for f in specs:
+            v = current.get(f['id'])
+            if v is not None:
+                v.code, v.status, v.change_note, v.requires = f['code'], 'approved', 'Setup', f['requires']
+                changed.append(v)
+        if changed:
+            bulk_update_with_history(changed, FactDefinitionVersion, ['code', 'status', 'change_note', 'requires'])
+            # bulk_update skips the post_save signal that normally drops cached code and instances
+            for v in changed:
+                invalidate_instance_cache(version_id=v.pk)
+                invalidate_code_cache(version_id=v.pk)
+
+        # Recognizers carry no history, so one upsert both creates and updates them
+        versions = {v.fact_definition_id: v for v in new_versions + changed}
+        IntentRecognizer.objects.bulk_create(
+            [
+                IntentRecognizer(fact_version=versions[f['id']], regex_patterns=f['regex_patterns'], keywords=f['keywords'])
+                for f in specs
+            ],
+            update_conflicts=True,
+            unique_fields=['fact_version'],
+            update_fields=['regex_patterns', 'keywords', 'updated_at'],
         )
+        # Nor do bulk writes send the signals that tell routers to recompile
+        invalidate_recognizers()
 
     def run_initial_questions(self, user: User) -> None:
         self.stdout.write("\n--- Running Initial QA to Build Taxonomy Facts ---")
@@ -701,7 +821,9 @@ return "This question cannot be answered yet because merchant information does n
             "How much did I spend at Amazon last month?"
         ]
         
+        # Every question is for the same user, so memoized lookups carry over between them
+        warm_cache = {}
         for q_text in questions:
             self.stdout.write(f"\nQuestion: {q_text}")
-            answer = engine.answer_question(q_text, user=user)
+            answer = engine.answer_question(q_text, user=user, cache=warm_cache)
             self.stdout.write(f"Answer: {answer}")
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-16 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='banktransaction',
+            index=models.Index(condition=models.Q(('balance__isnull', False)), fields=['account', '-posting_date', '-id'], name='bt_latest_bal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='banktransaction',
+            index=models.Index(condition=models.Q(('amount__lt', 0)), fields=['account', '-posting_date'], name='bt_bills_idx'),
+        ),
+    ]
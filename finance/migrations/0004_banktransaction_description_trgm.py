@@ -0,0 +1,32 @@
+from django.db import migrations
+
+# Django compiles description__icontains on PostgreSQL to UPPER("description"::text) LIKE UPPER(...),
+# so the trigram index is built on that same expression for the planner to match it.
+CREATE_INDEX = (
+    'CREATE INDEX IF NOT EXISTS btx_desc_trgm ON finance_banktransaction '
+    'USING gin ((UPPER("description"::text)) gin_trgm_ops)'
+)
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(CREATE_INDEX)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS btx_desc_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_banktransaction_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
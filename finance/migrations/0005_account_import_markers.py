@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 01:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_banktransaction_description_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='imported_bank_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='imported_credit_card_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -4,6 +4,9 @@ from django.contrib.auth.models import User
 class Account(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    # Set once setup_data has loaded the account's seed statement, so re-runs skip it without probing transactions
+    imported_bank_at = models.DateTimeField(null=True, blank=True)
+    imported_credit_card_at = models.DateTimeField(null=True, blank=True)
     
     def __str__(self):
         return self.name
@@ -18,6 +21,14 @@ class BankTransaction(models.Model):
     balance = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     check_or_slip_number = models.CharField(max_length=50, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Latest known balance per account
+            models.Index(fields=['account', '-posting_date', '-id'], name='bt_latest_bal_idx', condition=models.Q(balance__isnull=False)),
+            # Most recent outflows per account (bills / obligations)
+            models.Index(fields=['account', '-posting_date'], name='bt_bills_idx', condition=models.Q(amount__lt=0)),
+        ]
+
     def __str__(self):
         return f"{self.posting_date} - {self.description} - {self.amount}"
 
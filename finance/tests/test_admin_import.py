@@ -0,0 +1,181 @@
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from unittest import mock
+from django.test import TestCase, override_settings
+from finance.models import Account, BankTransaction, CreditCardTransaction
+
+class AdminCsvImportTests(TestCase):
+    """
+    Tests for the admin CSV upload views.
+    """
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Set up a staff user and an account to import into.
+        """
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.account = Account.objects.create(name="Checking", user=cls.user)
+
+    def setUp(self) -> None:
+        """
+        Log the staff user in.
+        """
+        self.client.force_login(self.user)
+
+    def _upload(self, url: str, content: str):
+        """
+        Posts a CSV file to an admin import view.
+        """
+        csv_file = SimpleUploadedFile("upload.csv", content.encode('utf-8'), content_type="text/csv")
+        return self.client.post(url, {"csv_file": csv_file, "account": self.account.pk})
+
+    def test_bank_import(self) -> None:
+        """
+        Test that valid bank rows are imported and unparseable rows are reported.
+        """
+        response = self._upload("/admin/finance/banktransaction/import-csv/", (
+            "Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #\n"
+            "DEBIT,01/05/2025,\"Coffee, shop\",-4.50,DEBIT_CARD,995.50,\n"
+            "DEBIT,bad-date,Broken,-1,DEBIT,,\n"
+            "DEBIT,01/02/2025,Rent,-1200.00,ACH_DEBIT,,123\n"
+        ))
+        self.assertEqual(response.status_code, 302)
+        rows = list(BankTransaction.objects.order_by('posting_date').values_list(
+            'posting_date', 'description', 'amount', 'balance', 'check_or_slip_number'))
+        self.assertEqual(rows, [
+            (date(2025, 1, 2), 'Rent', Decimal('-1200.00'), None, '123'),
+            (date(2025, 1, 5), 'Coffee, shop', Decimal('-4.50'), Decimal('995.50'), ''),
+        ])
+        messages = [str(m) for m in response.wsgi_request._messages]
+        self.assertIn("Skipped 1 rows with an invalid or out-of-range value (data rows 2)", messages)
+
+    def test_rows_that_do_not_fit_their_columns_are_reported(self) -> None:
+        """
+        Test that over-long text and amounts beyond max_digits are listed as bad rows instead of failing the upload.
+        """
+        response = self._upload("/admin/finance/banktransaction/import-csv/", (
+            "Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #\n"
+            f"DEBIT,01/05/2025,{'x' * 256},-4.50,DEBIT_CARD,,\n"
+            "DEBIT,01/05/2025,Wire,-123456789.00,WIRE,,\n"
+            "DEBIT,01/05/2025,Coffee,-4.50,DEBIT_CARD,99999999.99,\n"
+        ))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(BankTransaction.objects.values_list('description', flat=True)), ['Coffee'])
+        messages = [str(m) for m in response.wsgi_request._messages]
+        self.assertIn("Skipped 2 rows with an invalid or out-of-range value (data rows 1, 2)", messages)
+
+    def test_credit_card_import(self) -> None:
+        """
+        Test that credit card rows are imported with both dates parsed.
+        """
+        self._upload("/admin/finance/creditcardtransaction/import-csv/", (
+            "Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n"
+            "1234,01/04/2025,01/05/2025,Grocer,Groceries,Sale,-45.10,\n"
+            "1234,01/06/2025,01/07/2025,Refund,Shopping,Return,20.00,memo here\n"
+            "1234,01/06/2025,01/07/2025,Bad,Shopping,Sale,n/a,\n"
+        ))
+        rows = list(CreditCardTransaction.objects.order_by('transaction_date').values_list(
+            'transaction_date', 'post_date', 'amount', 'memo'))
+        self.assertEqual(rows, [
+            (date(2025, 1, 4), date(2025, 1, 5), Decimal('-45.10'), ''),
+            (date(2025, 1, 6), date(2025, 1, 7), Decimal('20.00'), 'memo here'),
+        ])
+
+    def test_reimport_skips_existing_rows(self) -> None:
+        """
+        Test that uploading the same statement twice does not duplicate transactions.
+        """
+        first = (
+            "Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #\n"
+            "DEBIT,01/05/2025,Coffee,-4.50,DEBIT_CARD,995.50,\n"
+        )
+        self._upload("/admin/finance/banktransaction/import-csv/", first)
+        response = self._upload("/admin/finance/banktransaction/import-csv/", first + "DEBIT,01/06/2025,Lunch,-12.00,DEBIT_CARD,983.50,\n")
+        messages = [str(m) for m in response.wsgi_request._messages]
+        self.assertIn("Skipped 1 rows that were already imported", messages)
+        self.assertEqual(
+            sorted(BankTransaction.objects.values_list('description', flat=True)),
+            ['Coffee', 'Lunch'],
+        )
+
+    def test_credit_card_reimport_skips_existing_rows(self) -> None:
+        """
+        Test that re-uploading a card statement matches stored amounts to the cent.
+        """
+        first = (
+            "Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n"
+            "1234,01/05/2025,01/06/2025,Coffee,Food,Sale,4.10,\n"
+        )
+        self._upload("/admin/finance/creditcardtransaction/import-csv/", first)
+        response = self._upload("/admin/finance/creditcardtransaction/import-csv/", first + "1234,01/06/2025,01/07/2025,Coffee,Food,Sale,4.11,\n")
+        messages = [str(m) for m in response.wsgi_request._messages]
+        self.assertIn("Skipped 1 rows that were already imported", messages)
+        self.assertEqual(
+            sorted(CreditCardTransaction.objects.values_list('amount', flat=True)),
+            [Decimal('4.10'), Decimal('4.11')],
+        )
+
+    def test_identical_rows_in_one_upload_are_kept(self) -> None:
+        """
+        Test that identical same-day rows are all stored, even across chunks, and a re-upload skips each once.
+        """
+        bank = (
+            "Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #\n"
+            "DEBIT,01/05/2025,Coffee,-4.50,DEBIT_CARD,995.50,\n"
+            "DEBIT,01/05/2025,Coffee,-4.50,DEBIT_CARD,991.00,\n"
+        )
+        card = (
+            "Card,Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n"
+            "1234,01/05/2025,01/06/2025,Coffee,Food,Sale,4.50,\n"
+            "1234,01/05/2025,01/06/2025,Coffee,Food,Sale,4.50,\n"
+        )
+        with mock.patch('finance.importers.IMPORT_CHUNK_SIZE', 1):
+            self._upload("/admin/finance/banktransaction/import-csv/", bank)
+            self._upload("/admin/finance/creditcardtransaction/import-csv/", card)
+        self.assertEqual(BankTransaction.objects.count(), 2)
+        self.assertEqual(CreditCardTransaction.objects.count(), 2)
+
+        response = self._upload("/admin/finance/banktransaction/import-csv/", bank)
+        messages = [str(m) for m in response.wsgi_request._messages]
+        self.assertIn("Skipped 2 rows that were already imported", messages)
+        self.assertEqual(BankTransaction.objects.count(), 2)
+
+    def test_import_in_chunks(self) -> None:
+        """
+        Test that rows and errors are collected across every parsed chunk.
+        """
+        with mock.patch('finance.importers.IMPORT_CHUNK_SIZE', 2):
+            response = self._upload("/admin/finance/banktransaction/import-csv/", (
+                "Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #\n"
+                "DEBIT,01/01/2025,A,-1,DEBIT,,\n"
+                "DEBIT,01/02/2025,B,-2,DEBIT,,\n"
+                "DEBIT,oops,C,-3,DEBIT,,\n"
+                "DEBIT,01/04/2025,D,-4,DEBIT,,\n"
+                "DEBIT,01/05/2025,E,-5,DEBIT,,\n"
+            ))
+        self.assertEqual(BankTransaction.objects.count(), 4)
+        messages = [str(m) for m in response.wsgi_request._messages]
+        self.assertIn("Skipped 1 rows with an invalid or out-of-range value (data rows 3)", messages)
+
+    def test_invalid_upload_shows_form_errors(self) -> None:
+        """
+        Test that a POST without a file re-renders the bound form with its errors.
+        """
+        url = "/admin/finance/banktransaction/import-csv/"
+        self.assertContains(self.client.get(url), self.account.name)
+        response = self.client.post(url, {"account": self.account.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].errors["csv_file"])
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_import_from_temporary_file_upload(self) -> None:
+        """
+        Test that uploads spooled to disk are streamed through the same parser.
+        """
+        self._upload("/admin/finance/banktransaction/import-csv/", (
+            "Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #\n"
+            "CREDIT,01/03/2025,Payroll Deposit,2000.00,ACH_CREDIT,1000.00,\n"
+        ))
+        self.assertEqual(BankTransaction.objects.get().amount, Decimal('2000.00'))
@@ -0,0 +1,57 @@
+import io
+from datetime import date
+from django.test import SimpleTestCase
+from finance.importers import BANK_COLUMNS, read_ahead, read_import_csv
+
+class ReadAheadTests(SimpleTestCase):
+    """
+    Tests for the background-thread chunk prefetcher.
+    """
+    def test_preserves_order(self) -> None:
+        """
+        Test that every item is yielded once, in order.
+        """
+        self.assertEqual(list(read_ahead(iter(range(10)), depth=2)), list(range(10)))
+
+    def test_reraises_producer_errors(self) -> None:
+        """
+        Test that an error raised while producing reaches the consumer after the items before it.
+        """
+        def produce():
+            yield 1
+            raise ValueError("bad chunk")
+
+        seen = []
+        with self.assertRaisesMessage(ValueError, "bad chunk"):
+            for item in read_ahead(produce()):
+                seen.append(item)
+        self.assertEqual(seen, [1])
+
+    def test_consumer_can_stop_early(self) -> None:
+        """
+        Test that abandoning the iterator does not leave the producer blocked.
+        """
+        for item in read_ahead(iter(range(1000)), depth=1):
+            if item == 3:
+                break
+        self.assertEqual(item, 3)
+
+class ReadImportCsvTests(SimpleTestCase):
+    """
+    Tests for vectorized CSV chunk parsing.
+    """
+    def test_parses_chunk(self) -> None:
+        """
+        Test that dates, numbers and blank optional numbers are converted and bad rows are numbered.
+        """
+        stream = io.StringIO(
+            "Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #\n"
+            "DEBIT,01/05/2025,Coffee,-4.50,DEBIT_CARD,,\n"
+            "DEBIT,01/06/2025,Broken,abc,DEBIT_CARD,,\n"
+        )
+        (df, invalid_rows), = read_import_csv(stream, BANK_COLUMNS, ['posting_date'], ['amount'], ['balance'])
+        self.assertEqual(invalid_rows, [2])
+        self.assertEqual(df.to_dict('records'), [{
+            'details': 'DEBIT', 'posting_date': date(2025, 1, 5), 'description': 'Coffee', 'amount': -4.5,
+            'type': 'DEBIT_CARD', 'balance': None, 'check_or_slip_number': '',
+        }])
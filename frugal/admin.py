@@ -9,6 +9,10 @@ class EntityAliasInline(admin.TabularInline):
     model = EntityAlias
     extra = 1
 
+    def get_queryset(self, request):
+        # Each row's label (EntityAlias.__str__) reads entity.name
+        return super().get_queryset(request).select_related('entity')
+
 @admin.register(Entity)
 class EntityAdmin(admin.ModelAdmin):
     list_display = ('name', 'category', 'created_at')
@@ -20,19 +24,22 @@ class EvidenceInline(admin.TabularInline):
     extra = 0
     readonly_fields = ('bank_transaction', 'credit_card_transaction')
 
+    def get_queryset(self, request):
+        # Read-only foreign keys render each transaction's __str__, so join them in
+        return super().get_queryset(request).select_related('bank_transaction', 'credit_card_transaction')
+
 @admin.register(RecurrenceCandidate)
 class RecurrenceCandidateAdmin(admin.ModelAdmin):
     list_display = ('entity', 'type', 'predicted_amount', 'predicted_periodicity', 'confidence', 'status')
     list_filter = ('status', 'type', 'predicted_periodicity')
+    list_select_related = ('entity',)
     inlines = [EvidenceInline]
     actions = ['confirm_candidates']
 
     def confirm_candidates(self, request, queryset):
-        for candidate in queryset:
-            if candidate.status == 'pending':
-                # Logic to confirm would go here, but usually requires user input for final details
-                # For admin action, we might just mark status, but creating the RecurringExpense is better done via a proper view/service
-                pass
+        # One UPDATE for the whole selection; creating the RecurringExpense is left to a proper view/service
+        updated = queryset.confirm_ids(queryset.values('pk'))
+        self.message_user(request, f"{updated} candidates confirmed.")
     confirm_candidates.short_description = "Mark selected candidates as confirmed (Metadata only)"
 
 @admin.register(RecurringExpense)
@@ -47,12 +54,15 @@ class RecurringIncomeAdmin(admin.ModelAdmin):
 @admin.register(UserConfirmationEvent)
 class UserConfirmationEventAdmin(admin.ModelAdmin):
     list_display = ('user', 'candidate', 'action', 'timestamp')
+    list_select_related = ('user', 'candidate')
     readonly_fields = ('user', 'candidate', 'action', 'timestamp', 'original_values', 'final_values')
 
 @admin.register(ReservePolicy)
 class ReservePolicyAdmin(admin.ModelAdmin):
     list_display = ('name', 'user', 'target_amount', 'percentage_of_income', 'priority')
+    list_select_related = ('user',)
 
 @admin.register(ReserveInstance)
 class ReserveInstanceAdmin(admin.ModelAdmin):
     list_display = ('policy', 'amount', 'date')
+    list_select_related = ('policy',)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class FrugalConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'frugal'
+
+    def ready(self):
+        # Keep in-process alias resolvers in sync with the DB
+        from frugal import signals  # noqa: F401
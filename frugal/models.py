@@ -1,8 +1,54 @@
-from django.db import models
+import re
+from decimal import Decimal
+from functools import lru_cache
+from django.db import connection, models, transaction
 from django.contrib.auth.models import User
+from django.core.validators import MaxValueValidator
 from django.utils import timezone
 from finance.models import BankTransaction, CreditCardTransaction
 
+# Length in days of each known periodicity, so due-date queries compare integers in SQL
+PERIOD_DAYS = {'daily': 1, 'weekly': 7, 'biweekly': 14, 'monthly': 30, 'quarterly': 91, 'yearly': 365}
+
+def period_days_for(periodicity, default=30):
+    """
+    Maps a free-form periodicity ("Monthly", " weekly") to its length in days.
+    """
+    return PERIOD_DAYS.get(periodicity.strip().lower(), default)
+
+@lru_cache(maxsize=4096)
+def _compile_alias(pattern):
+    """
+    Compiles an alias regex once per process; invalid patterns compile to None and never match.
+    """
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return None
+
+def partition_aliases(aliases, attr):
+    """
+    Splits aliases, in precedence order, into a dict of exact patterns and a list of
+    (compiled regex, value) pairs, where value is getattr(alias, attr). Invalid regexes are dropped.
+    """
+    exact = {}
+    regexes = []
+    for alias in aliases:
+        if not alias.is_regex:
+            exact.setdefault(alias.raw_description_pattern, getattr(alias, attr))
+        elif alias.compiled() is not None:
+            regexes.append((alias.compiled(), getattr(alias, attr)))
+    return exact, regexes
+
+def match_description(exact, regexes, description):
+    """
+    Looks a description up in partition_aliases() output: exact aliases first, then the first matching regex.
+    """
+    value = exact.get(description)
+    if value is None:
+        value = next((v for pattern, v in regexes if pattern.search(description)), None)
+    return value
+
 class Entity(models.Model):
     """
     Represents a real-world entity (merchant, employer, person)
@@ -25,9 +71,79 @@ class EntityAlias(models.Model):
     is_regex = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Exact-match alias lookups; regex aliases are scanned, not looked up
+            models.Index(fields=['raw_description_pattern'], name='alias_exact_idx', condition=models.Q(is_regex=False)),
+        ]
+
     def __str__(self):
         return f"{self.raw_description_pattern} -> {self.entity.name}"
 
+    def compiled(self):
+        return _compile_alias(self.raw_description_pattern) if self.is_regex else None
+
+    @classmethod
+    def match_bulk(cls, descriptions):
+        """
+        Resolves each description to its Entity (or None), loading every alias once.
+        Exact aliases are dictionary lookups and take precedence; regex aliases are tried in order.
+        """
+        exact, regexes = partition_aliases(cls.objects.select_related('entity').order_by('id'), 'entity')
+        return [match_description(exact, regexes, desc) for desc in descriptions]
+
+class RecurrenceCandidateQuerySet(models.QuerySet):
+    def confirm_ids(self, ids):
+        """
+        Marks the pending candidates among `ids` confirmed with a single UPDATE of status and
+        updated_at (which update() does not set on its own). Returns how many were confirmed.
+        """
+        return self.filter(pk__in=ids, status='pending').update(status='confirmed', updated_at=timezone.now())
+
+    def confirm_returning(self, ids, now):
+        """
+        Like confirm_ids(), but returns the set of pks this UPDATE actually moved from pending
+        to confirmed, so rows confirmed concurrently are left out. Call inside a transaction.
+        """
+        ids = list(ids)
+        if not ids:
+            return set()
+        if connection.vendor == 'postgresql':
+            table = self.model._meta.db_table
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE "{table}" SET status = %s, updated_at = %s '
+                    f"WHERE id = ANY(%s) AND status = 'pending' RETURNING id",
+                    ['confirmed', now, ids],
+                )
+                return {row[0] for row in cursor.fetchall()}
+        # Other backends lack UPDATE ... RETURNING; lock the pending rows, then update exactly those
+        locked = set(self.select_for_update().filter(pk__in=ids, status='pending').values_list('pk', flat=True))
+        self.filter(pk__in=locked).update(status='confirmed', updated_at=now)
+        return locked
+
+    def slim(self):
+        """
+        Loads only the columns candidate lists display. Reading any other field on the
+        results costs one extra query per row, so use with_evidence() or the full queryset there.
+        """
+        return self.only(
+            'id', 'status', 'type', 'predicted_amount', 'predicted_periodicity',
+            'next_expected_date', 'confidence_milli', 'entity_id',
+        )
+
+    def with_evidence(self):
+        """
+        Joins each candidate's entity and user and prefetches its evidence with the linked
+        transactions, so listing candidates with their evidence takes two queries in total.
+        """
+        return self.select_related('entity', 'user').prefetch_related(
+            models.Prefetch(
+                'evidence',
+                queryset=RecurrenceCandidateEvidence.objects.select_related('bank_transaction', 'credit_card_transaction'),
+            )
+        )
+
 class RecurrenceCandidate(models.Model):
     """
     A hypothesis about a recurring expense or income.
@@ -45,9 +161,14 @@ class RecurrenceCandidate(models.Model):
     # Inferred properties
     predicted_amount = models.DecimalField(max_digits=10, decimal_places=2)
     predicted_periodicity = models.CharField(max_length=50, help_text="e.g., monthly, weekly")
+    # Derived from predicted_periodicity on save()
+    period_days = models.PositiveSmallIntegerField(default=30)
     next_expected_date = models.DateField()
     
-    confidence = models.FloatField(help_text="0.0 to 1.0 score of inference certainty")
+    # Stored in thousandths so the score is a 2-byte int; read and set it through `confidence`
+    confidence_milli = models.PositiveSmallIntegerField(
+        default=0, validators=[MaxValueValidator(1000)], help_text="0 to 1000 score of inference certainty"
+    )
     status = models.CharField(
         max_length=20, 
         choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('rejected', 'Rejected')],
@@ -57,9 +178,78 @@ class RecurrenceCandidate(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = RecurrenceCandidateQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # A user's candidates by status, soonest expected first
+            models.Index(fields=['user', 'status', 'next_expected_date'], name='rc_user_status_idx'),
+            models.Index(fields=['user', 'type', 'status'], name='rc_user_type_status_idx'),
+            # Most confident candidates first
+            models.Index(fields=['user', '-confidence_milli'], name='rc_user_confidence_idx'),
+        ]
+
+    @property
+    def confidence(self):
+        """
+        0.0 to 1.0 score of inference certainty.
+        """
+        return self.confidence_milli / 1000
+
+    @confidence.setter
+    def confidence(self, value):
+        self.confidence_milli = round(value * 1000)
+
+    def save(self, *args, **kwargs):
+        self.period_days = period_days_for(self.predicted_periodicity, self.period_days)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Candidate {self.type}: {self.predicted_amount} ({self.status})"
 
+    @classmethod
+    def bulk_confirm(cls, candidates, user):
+        """
+        Confirms pending candidates, creating their RecurringExpense/RecurringIncome rows and
+        confirmation events with one write per table instead of three per candidate.
+        Pass candidates with their entity loaded (see with_evidence()). Returns how many were confirmed.
+        """
+        candidates = [c for c in candidates if c.status == 'pending']
+        if not candidates:
+            return 0
+
+        def recurring(model, c, date_field):
+            return model(
+                user=user,
+                entity=c.entity,
+                name=c.entity.name if c.entity else f"Unnamed {c.type}",
+                amount=c.predicted_amount,
+                periodicity=c.predicted_periodicity,
+                # bulk_create skips save(), so the candidate's derived period is copied over
+                period_days=c.period_days,
+                source_candidate=c,
+                **{date_field: c.next_expected_date},
+            )
+
+        now = timezone.now()
+        with transaction.atomic():
+            confirmed = cls.objects.confirm_returning([c.pk for c in candidates], now)
+            # Only the rows this call moved out of pending get children; stale copies are skipped
+            candidates = [c for c in candidates if c.pk in confirmed]
+            RecurringExpense.objects.bulk_create(
+                [recurring(RecurringExpense, c, 'next_due_date') for c in candidates if c.type == 'expense'], batch_size=500
+            )
+            RecurringIncome.objects.bulk_create(
+                [recurring(RecurringIncome, c, 'next_expected_date') for c in candidates if c.type == 'income'], batch_size=500
+            )
+            UserConfirmationEvent.objects.bulk_create(
+                [UserConfirmationEvent(user=user, candidate=c, action='confirm', timestamp=now) for c in candidates], batch_size=500
+            )
+        for c in candidates:
+            c.status = 'confirmed'
+            c.updated_at = now
+        return len(candidates)
+
 class RecurrenceCandidateEvidence(models.Model):
     """
     Links a candidate to the specific transactions that generated the hypothesis.
@@ -67,23 +257,38 @@ class RecurrenceCandidateEvidence(models.Model):
     candidate = models.ForeignKey(RecurrenceCandidate, on_delete=models.CASCADE, related_name='evidence')
     bank_transaction = models.ForeignKey(BankTransaction, on_delete=models.CASCADE, null=True, blank=True)
     credit_card_transaction = models.ForeignKey(CreditCardTransaction, on_delete=models.CASCADE, null=True, blank=True)
-    
+
+    class Meta:
+        constraints = [
+            # A transaction backs a candidate once, so re-running inference with
+            # bulk_create(..., ignore_conflicts=True) leaves the evidence unchanged
+            models.UniqueConstraint(fields=['candidate', 'bank_transaction'], condition=models.Q(bank_transaction__isnull=False), name='uniq_ev_bank'),
+            models.UniqueConstraint(fields=['candidate', 'credit_card_transaction'], condition=models.Q(credit_card_transaction__isnull=False), name='uniq_ev_cc'),
+            # Enforced on every insert, bulk ones included; clean() only gives forms a readable error
+            models.CheckConstraint(
+                condition=models.Q(bank_transaction__isnull=False) | models.Q(credit_card_transaction__isnull=False),
+                name='ev_has_tx',
+                violation_error_message="Must link to either a bank or credit card transaction",
+            ),
+        ]
+
     def clean(self):
         from django.core.exceptions import ValidationError
         if not self.bank_transaction and not self.credit_card_transaction:
             raise ValidationError("Must link to either a bank or credit card transaction")
 
-class RecurringExpense(models.Model):
+class RecurringItem(models.Model):
     """
-    A confirmed recurring expense.
-    This is Level 2 knowledge (Inferred Structure -> Confirmed Fact).
+    Fields shared by confirmed recurring expenses and income.
+    Each subclass names its own next-date field and sets `direction`.
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     entity = models.ForeignKey(Entity, on_delete=models.SET_NULL, null=True, blank=True)
     name = models.CharField(max_length=255)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     periodicity = models.CharField(max_length=50) # e.g. 'monthly', 'yearly'
-    next_due_date = models.DateField()
+    # Derived from periodicity on save()
+    period_days = models.PositiveSmallIntegerField(default=30)
     is_active = models.BooleanField(default=True)
     
     # Link back to the candidate that spawned this (if any)
@@ -92,28 +297,75 @@ class RecurringExpense(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.period_days = period_days_for(self.periodicity, self.period_days)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} - {self.amount} ({self.periodicity})"
 
-class RecurringIncome(models.Model):
+    @staticmethod
+    def cashflow(user):
+        """
+        The user's active recurring expenses and income as one UNION ALL query of dicts
+        (direction, name, amount, periodicity, next_date), soonest first.
+        """
+        def items(model, date_field):
+            return model.objects.filter(user=user, is_active=True).annotate(
+                direction=models.Value(model.direction, output_field=models.CharField()),
+                next_date=models.F(date_field),
+            ).values('direction', 'name', 'amount', 'periodicity', 'next_date')
+
+        return items(RecurringExpense, 'next_due_date').union(
+            items(RecurringIncome, 'next_expected_date'), all=True
+        ).order_by('next_date')
+
+    @staticmethod
+    def monthly_totals(user):
+        """
+        The user's active recurring outflow and inflow, each normalised to a 30-day month:
+        {'monthly_out': ..., 'monthly_in': ...}. Amounts are summed in the database per
+        period_days (one row per distinct period) and scaled with Decimal arithmetic, so money
+        never passes through float or SQLite's integer division.
+        """
+        totals = {}
+        for key, model in (('monthly_out', RecurringExpense), ('monthly_in', RecurringIncome)):
+            per_period = model.objects.filter(user=user, is_active=True).values_list('period_days').annotate(total=models.Sum('amount')).order_by()
+            total = sum((Decimal(amount) * 30 / days for days, amount in per_period), Decimal(0))
+            totals[key] = round(total, 2)
+        return totals
+
+class RecurringExpense(RecurringItem):
+    """
+    A confirmed recurring expense.
+    This is Level 2 knowledge (Inferred Structure -> Confirmed Fact).
+    """
+    direction = 'expense'
+
+    next_due_date = models.DateField()
+
+    class Meta:
+        indexes = [
+            # A user's active bills, next due first
+            models.Index(fields=['user', 'is_active', 'next_due_date'], name='rexp_user_active_due_idx'),
+        ]
+
+class RecurringIncome(RecurringItem):
     """
     A confirmed recurring income source.
     """
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    entity = models.ForeignKey(Entity, on_delete=models.SET_NULL, null=True, blank=True)
-    name = models.CharField(max_length=255)
-    amount = models.DecimalField(max_digits=10, decimal_places=2)
-    periodicity = models.CharField(max_length=50)
+    direction = 'income'
+
     next_expected_date = models.DateField()
-    is_active = models.BooleanField(default=True)
-    
-    source_candidate = models.OneToOneField(RecurrenceCandidate, on_delete=models.SET_NULL, null=True, blank=True)
-    
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
 
-    def __str__(self):
-        return f"{self.name} - {self.amount} ({self.periodicity})"
+    class Meta:
+        indexes = [
+            # A user's active income sources, next expected first
+            models.Index(fields=['user', 'is_active', 'next_expected_date'], name='rinc_user_active_next_idx'),
+        ]
 
 class UserConfirmationEvent(models.Model):
     """
@@ -142,6 +394,15 @@ class ReservePolicy(models.Model):
     def __str__(self):
         return self.name
 
+class ReserveInstanceQuerySet(models.QuerySet):
+    def latest_per_policy(self, user):
+        """
+        Each of the user's policies' most recent allocation, with its policy joined.
+        One query; ri_policy_latest_idx serves the per-policy lookup.
+        """
+        latest_id = ReserveInstance.objects.filter(policy=models.OuterRef('policy')).order_by('-date', '-id').values('id')[:1]
+        return self.filter(policy__user=user, id=models.Subquery(latest_id)).select_related('policy')
+
 class ReserveInstance(models.Model):
     """
     Actual allocation of funds to a policy at a point in time.
@@ -149,6 +410,14 @@ class ReserveInstance(models.Model):
     policy = models.ForeignKey(ReservePolicy, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     date = models.DateField(default=timezone.now)
-    
+
+    objects = ReserveInstanceQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Latest allocation per policy
+            models.Index(fields=['policy', '-date', '-id'], name='ri_policy_latest_idx'),
+        ]
+
     def __str__(self):
         return f"{self.policy.name}: {self.amount}"
@@ -0,0 +1,41 @@
+from functools import lru_cache
+from frugal.models import EntityAlias, match_description, partition_aliases
+
+# Bumped whenever aliases change so live resolvers reload lazily.
+_generation = 0
+
+def invalidate_aliases():
+    """
+    Marks every resolver's loaded aliases as stale.
+    """
+    global _generation
+    _generation += 1
+
+class EntityResolver:
+    """
+    Resolves raw transaction descriptions to entity ids for inference passes.
+    Aliases are loaded once (exact ones into a dict, regex ones precompiled) and each
+    description's result is kept in an LRU cache, so repeat descriptions skip both the
+    database and the regex scan. Reloaded on the next resolve() after invalidate_aliases().
+    """
+    def __init__(self, maxsize=65536):
+        self._maxsize = maxsize
+        self._load_aliases()
+
+    def _load_aliases(self):
+        self._generation = _generation
+        self._exact, self._regexes = partition_aliases(
+            EntityAlias.objects.order_by('id').only('entity_id', 'raw_description_pattern', 'is_regex'), 'entity_id'
+        )
+        self._cached_match = lru_cache(maxsize=self._maxsize)(self._match)
+
+    def _match(self, description):
+        return match_description(self._exact, self._regexes, description)
+
+    def resolve(self, description):
+        """
+        Returns the id of the Entity a description belongs to, or None.
+        """
+        if self._generation != _generation:
+            self._load_aliases()
+        return self._cached_match(description)
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from frugal.models import EntityAlias
+from frugal.resolver import invalidate_aliases
+
+@receiver([post_save, post_delete], sender=EntityAlias)
+def entity_alias_changed(sender, instance, **kwargs):
+    """
+    Forces resolvers to reload their aliases on next use.
+    """
+    invalidate_aliases()
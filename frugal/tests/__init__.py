@@ -0,0 +1,21 @@
+from decimal import Decimal
+from django.utils import timezone
+from frugal.models import RecurrenceCandidate
+
+class CandidateFactoryMixin:
+    """
+    Shared candidate factory for frugal test cases; expects self.user.
+    """
+    def _candidate(self, **fields):
+        """
+        Creates a pending monthly 15.99 expense candidate, overridden by `fields`.
+        """
+        defaults = {
+            'user': self.user,
+            'type': 'expense',
+            'predicted_amount': Decimal('15.99'),
+            'predicted_periodicity': 'monthly',
+            'next_expected_date': timezone.now().date(),
+            'confidence': 0.9,
+        }
+        return RecurrenceCandidate.objects.create(**{**defaults, **fields})
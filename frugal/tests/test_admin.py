@@ -0,0 +1,74 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from finance.models import Account, BankTransaction
+from frugal.models import Entity, RecurrenceCandidateEvidence
+from frugal.tests import CandidateFactoryMixin
+
+class RecurrenceCandidateAdminTests(CandidateFactoryMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(username='admin', password='password')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_confirm_candidates_action(self):
+        """
+        Test that the admin action confirms only the pending candidates in the selection.
+        """
+        pending = self._candidate()
+        rejected = self._candidate(status='rejected')
+        response = self.client.post('/admin/frugal/recurrencecandidate/', {
+            'action': 'confirm_candidates',
+            '_selected_action': [pending.pk, rejected.pk],
+        }, follow=True)
+        messages = [str(m) for m in response.context['messages']]
+        self.assertIn("1 candidates confirmed.", messages)
+        pending.refresh_from_db()
+        rejected.refresh_from_db()
+        self.assertEqual(pending.status, 'confirmed')
+        self.assertEqual(rejected.status, 'rejected')
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """
+        Test that candidate entities are joined into the changelist query rather than fetched per row.
+        """
+        self._candidate(entity=Entity.objects.create(name='Netflix'))
+        with CaptureQueriesContext(connection) as one_row:
+            self.client.get('/admin/frugal/recurrencecandidate/')
+        for name in ('Spotify', 'Gym'):
+            self._candidate(entity=Entity.objects.create(name=name))
+        with CaptureQueriesContext(connection) as three_rows:
+            response = self.client.get('/admin/frugal/recurrencecandidate/')
+        self.assertContains(response, 'Spotify')
+        self.assertEqual(len(three_rows), len(one_row))
+
+    def test_change_form_queries_do_not_grow_with_evidence(self):
+        """
+        Test that evidence transactions on a candidate's page are joined rather than fetched per row.
+        """
+        candidate = self._candidate()
+        account = Account.objects.create(name='Checking', user=self.user)
+
+        def add_evidence(description):
+            tx = BankTransaction.objects.create(
+                account=account, details='DEBIT', posting_date=timezone.now().date(),
+                description=description, amount=Decimal('-15.99'), type='DEBIT'
+            )
+            RecurrenceCandidateEvidence.objects.create(candidate=candidate, bank_transaction=tx)
+
+        url = f'/admin/frugal/recurrencecandidate/{candidate.pk}/change/'
+        add_evidence('NETFLIX.COM 1')
+        self.client.get(url)  # Warm per-process caches such as content types
+        with CaptureQueriesContext(connection) as one_row:
+            self.client.get(url)
+        add_evidence('NETFLIX.COM 2')
+        add_evidence('NETFLIX.COM 3')
+        with CaptureQueriesContext(connection) as three_rows:
+            response = self.client.get(url)
+        self.assertContains(response, 'NETFLIX.COM 3')
+        self.assertEqual(len(three_rows), len(one_row))
@@ -1,22 +1,28 @@
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from django.utils import timezone
 from decimal import Decimal
 from finance.models import Account, BankTransaction
 from frugal.models import (
-    Entity, RecurrenceCandidate, RecurrenceCandidateEvidence, 
-    RecurringExpense, UserConfirmationEvent
+    Entity, EntityAlias, RecurrenceCandidate, RecurrenceCandidateEvidence, 
+    RecurringExpense, RecurringIncome, RecurringItem, UserConfirmationEvent
 )
+from datetime import date
+from frugal.tests import CandidateFactoryMixin
 
-class RecurrenceInferenceTests(TestCase):
-    def setUp(self):
-        self.user = User.objects.create(username='testuser')
-        self.account = Account.objects.create(name='Checking', user=self.user)
-        self.entity = Entity.objects.create(name='Netflix')
+class RecurrenceInferenceTests(CandidateFactoryMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Created once per class; each test gets its own copy, rolled back afterwards
+        cls.user = User.objects.create(username='testuser')
+        cls.account = Account.objects.create(name='Checking', user=cls.user)
+        cls.entity = Entity.objects.create(name='Netflix')
         
         # Create some transactions
-        self.tx1 = BankTransaction.objects.create(
-            account=self.account,
+        cls.tx1 = BankTransaction.objects.create(
+            account=cls.account,
             details='DEBIT',
             posting_date=timezone.now().date(),
             description='NETFLIX.COM',
@@ -28,38 +34,55 @@ class RecurrenceInferenceTests(TestCase):
         """
         Test that we can create a candidate and link evidence.
         """
-        candidate = RecurrenceCandidate.objects.create(
-            user=self.user,
-            entity=self.entity,
-            type='expense',
-            predicted_amount=Decimal('15.99'),
-            predicted_periodicity='monthly',
-            next_expected_date=timezone.now().date(),
-            confidence=0.9
-        )
+        candidate = self._candidate(entity=self.entity)
         
         evidence = RecurrenceCandidateEvidence.objects.create(
             candidate=candidate,
             bank_transaction=self.tx1
         )
         
+        linked = list(candidate.evidence.all())
+        self.assertEqual(len(linked), 1)
+        self.assertEqual(linked[0].bank_transaction, self.tx1)
+
+    def test_evidence_is_not_duplicated(self):
+        """
+        Test that re-emitting the same evidence is dropped by the database.
+        """
+        candidate = self._candidate(entity=self.entity)
+        for _ in range(2):
+            RecurrenceCandidateEvidence.objects.bulk_create(
+                [RecurrenceCandidateEvidence(candidate=candidate, bank_transaction=self.tx1)],
+                ignore_conflicts=True
+            )
         self.assertEqual(candidate.evidence.count(), 1)
-        self.assertEqual(candidate.evidence.first().bank_transaction, self.tx1)
+
+    def test_alias_match_bulk(self):
+        """
+        Test that descriptions resolve through exact aliases first, then regex aliases.
+        """
+        spotify = Entity.objects.create(name='Spotify')
+        EntityAlias.objects.create(entity=self.entity, raw_description_pattern=r'NETFLIX\.COM.*', is_regex=True)
+        EntityAlias.objects.create(entity=spotify, raw_description_pattern='NETFLIX.COM SPOTIFY BUNDLE')
+        EntityAlias.objects.create(entity=spotify, raw_description_pattern='(unclosed', is_regex=True)
+        with self.assertNumQueries(1):
+            matched = EntityAlias.match_bulk(['NETFLIX.COM* CA', 'NETFLIX.COM SPOTIFY BUNDLE', 'GROCER'])
+        self.assertEqual(matched, [self.entity, spotify, None])
+
+    def test_evidence_requires_a_transaction(self):
+        """
+        Test that the database rejects evidence linked to no transaction, even through bulk_create.
+        """
+        candidate = self._candidate()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            RecurrenceCandidateEvidence.objects.bulk_create([RecurrenceCandidateEvidence(candidate=candidate)])
+        self.assertEqual(candidate.evidence.count(), 0)
 
     def test_confirmation_flow(self):
         """
         Test confirming a candidate creates a RecurringExpense.
         """
-        candidate = RecurrenceCandidate.objects.create(
-            user=self.user,
-            entity=self.entity,
-            type='expense',
-            predicted_amount=Decimal('15.99'),
-            predicted_periodicity='monthly',
-            next_expected_date=timezone.now().date(),
-            confidence=0.9,
-            status='pending'
-        )
+        candidate = self._candidate(entity=self.entity)
         
         # Simulate User Action
         candidate.status = 'confirmed'
@@ -85,6 +108,133 @@ class RecurrenceInferenceTests(TestCase):
         self.assertEqual(expense.source_candidate, candidate)
         self.assertEqual(expense.amount, Decimal('15.99'))
 
+    def test_confidence_is_stored_in_thousandths(self):
+        """
+        Test that the 0.0-1.0 confidence round-trips through its integer column.
+        """
+        candidate = self._candidate(confidence=0.875)
+        candidate.refresh_from_db()
+        self.assertEqual(candidate.confidence_milli, 875)
+        self.assertEqual(candidate.confidence, 0.875)
+
+    def test_period_days_follow_periodicity(self):
+        """
+        Test that saving derives period_days from the periodicity string, keeping it for unknown ones.
+        """
+        candidate = self._candidate(predicted_periodicity='Weekly')
+        self.assertEqual(candidate.period_days, 7)
+        candidate.predicted_periodicity = 'every other blue moon'
+        candidate.save()
+        self.assertEqual(candidate.period_days, 7)
+
+        RecurrenceCandidate.bulk_confirm([candidate], self.user)
+        self.assertEqual(RecurringExpense.objects.get().period_days, 7)
+
+    def test_confirm_ids_is_one_update(self):
+        """
+        Test that confirming a batch of candidates is a single UPDATE touching only pending ones.
+        """
+        pending = [self._candidate() for _ in range(3)]
+        rejected = self._candidate(status='rejected')
+        with self.assertNumQueries(1):
+            confirmed = RecurrenceCandidate.objects.confirm_ids([c.pk for c in pending] + [rejected.pk])
+        self.assertEqual(confirmed, 3)
+        self.assertEqual(RecurrenceCandidate.objects.filter(status='confirmed').count(), 3)
+        rejected.refresh_from_db()
+        self.assertEqual(rejected.status, 'rejected')
+
+    def test_bulk_confirm(self):
+        """
+        Test that bulk_confirm creates the recurring rows and audit events for pending candidates only.
+        """
+        expense = self._candidate(entity=self.entity)
+        income = self._candidate(entity=self.entity, type='income')
+        rejected = self._candidate(entity=self.entity, status='rejected')
+        candidates = list(RecurrenceCandidate.objects.select_related('entity'))
+        with CaptureQueriesContext(connection) as queries:
+            confirmed = RecurrenceCandidate.bulk_confirm(candidates, self.user)
+
+        # One INSERT per table however many candidates; the confirm step varies by backend
+        inserts = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)
+
+        self.assertEqual(confirmed, 2)
+        self.assertEqual(RecurringExpense.objects.get().source_candidate, expense)
+        self.assertEqual(RecurringIncome.objects.get().name, 'Netflix')
+        self.assertEqual(
+            sorted(UserConfirmationEvent.objects.values_list('candidate_id', flat=True)),
+            [expense.pk, income.pk],
+        )
+        self.assertEqual(
+            dict(RecurrenceCandidate.objects.values_list('pk', 'status')),
+            {expense.pk: 'confirmed', income.pk: 'confirmed', rejected.pk: 'rejected'},
+        )
+
+    def test_bulk_confirm_skips_stale_pending_copies(self):
+        """
+        Test that a candidate still pending in memory but already confirmed in the database gets no new rows.
+        """
+        stale = self._candidate(entity=self.entity)
+        candidates = list(RecurrenceCandidate.objects.select_related('entity'))
+        RecurrenceCandidate.objects.confirm_ids([stale.pk])
+
+        confirmed = RecurrenceCandidate.bulk_confirm(candidates, self.user)
+
+        self.assertEqual(confirmed, 0)
+        self.assertFalse(RecurringExpense.objects.exists())
+        self.assertFalse(UserConfirmationEvent.objects.exists())
+
+    def test_slim_defers_undisplayed_columns(self):
+        """
+        Test that slim() loads the display columns, including the confidence score, and defers the rest.
+        """
+        self._candidate(entity=self.entity)
+        candidate = RecurrenceCandidate.objects.slim().get()
+        self.assertEqual(candidate.get_deferred_fields(), {'user_id', 'period_days', 'created_at', 'updated_at'})
+        with self.assertNumQueries(0):
+            self.assertEqual((candidate.status, candidate.confidence), ('pending', 0.9))
+
+    def test_with_evidence_loads_candidates_in_two_queries(self):
+        """
+        Test that candidates, their entities and their evidence transactions load without per-row queries.
+        """
+        for _ in range(3):
+            candidate = self._candidate(entity=self.entity)
+            RecurrenceCandidateEvidence.objects.create(candidate=candidate, bank_transaction=self.tx1)
+
+        with self.assertNumQueries(2):
+            rows = [
+                (c.entity.name, [e.bank_transaction.description for e in c.evidence.all()])
+                for c in RecurrenceCandidate.objects.with_evidence()
+            ]
+        self.assertEqual(rows, [('Netflix', ['NETFLIX.COM'])] * 3)
+
+    def test_cashflow_merges_expenses_and_income(self):
+        """
+        Test that active recurring expenses and income come back as one date-ordered query.
+        """
+        RecurringExpense.objects.create(user=self.user, name='Rent', amount=Decimal('1200.00'), periodicity='monthly', next_due_date=date(2025, 2, 1))
+        RecurringExpense.objects.create(user=self.user, name='Old Gym', amount=Decimal('30.00'), periodicity='monthly', next_due_date=date(2025, 1, 1), is_active=False)
+        RecurringIncome.objects.create(user=self.user, name='Payroll', amount=Decimal('2000.00'), periodicity='biweekly', next_expected_date=date(2025, 1, 15))
+        with self.assertNumQueries(1):
+            items = [(i['direction'], i['name'], i['next_date']) for i in RecurringItem.cashflow(self.user)]
+        self.assertEqual(items, [
+            ('income', 'Payroll', date(2025, 1, 15)),
+            ('expense', 'Rent', date(2025, 2, 1)),
+        ])
+
+    def test_monthly_totals(self):
+        """
+        Test that recurring amounts are normalised to a month and summed per direction.
+        """
+        RecurringExpense.objects.create(user=self.user, name='Rent', amount=Decimal('1200.00'), periodicity='monthly', next_due_date=date(2025, 2, 1))
+        RecurringExpense.objects.create(user=self.user, name='Gym', amount=Decimal('10.00'), periodicity='weekly', next_due_date=date(2025, 1, 1), is_active=False)
+        RecurringIncome.objects.create(user=self.user, name='Payroll', amount=Decimal('2000.00'), periodicity='biweekly', next_expected_date=date(2025, 1, 15))
+        self.assertEqual(RecurringItem.monthly_totals(self.user), {
+            'monthly_out': Decimal('1200.00'),
+            'monthly_in': Decimal('4285.71'),
+        })
+
     def test_transactions_do_not_imply_recurring_automatically(self):
         """
         Ensure that merely having transactions does not create RecurringExpense
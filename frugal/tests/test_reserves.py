@@ -0,0 +1,27 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from django.contrib.auth.models import User
+from frugal.models import ReserveInstance, ReservePolicy
+
+class ReserveInstanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='testuser')
+        other = User.objects.create(username='other')
+        cls.emergency = ReservePolicy.objects.create(user=cls.user, name='Emergency Fund')
+        cls.tax = ReservePolicy.objects.create(user=cls.user, name='Tax Reserve')
+        ReserveInstance.objects.bulk_create([
+            ReserveInstance(policy=cls.emergency, amount=Decimal('100.00'), date=date(2025, 1, 1)),
+            ReserveInstance(policy=cls.emergency, amount=Decimal('250.00'), date=date(2025, 2, 1)),
+            ReserveInstance(policy=cls.tax, amount=Decimal('75.00'), date=date(2025, 1, 15)),
+            ReserveInstance(policy=ReservePolicy.objects.create(user=other, name='Other'), amount=Decimal('1.00'), date=date(2025, 3, 1)),
+        ])
+
+    def test_latest_per_policy(self):
+        """
+        Test that only each of the user's policies' newest allocation is returned, in one query.
+        """
+        with self.assertNumQueries(1):
+            latest = {(r.policy.name, r.amount) for r in ReserveInstance.objects.latest_per_policy(self.user)}
+        self.assertEqual(latest, {('Emergency Fund', Decimal('250.00')), ('Tax Reserve', Decimal('75.00'))})
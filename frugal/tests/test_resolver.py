@@ -0,0 +1,32 @@
+from django.test import TestCase
+from frugal.models import Entity, EntityAlias
+from frugal.resolver import EntityResolver
+
+class EntityResolverTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.netflix = Entity.objects.create(name='Netflix')
+        EntityAlias.objects.create(entity=cls.netflix, raw_description_pattern='NETFLIX.COM')
+        EntityAlias.objects.create(entity=cls.netflix, raw_description_pattern=r'NETFLIX\.COM\*', is_regex=True)
+
+    def setUp(self):
+        # Resolvers hold in-process state, so each test builds its own
+        self.resolver = EntityResolver()
+
+    def test_resolves_without_queries_once_loaded(self):
+        """
+        Test that exact and regex aliases resolve from memory.
+        """
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolver.resolve('NETFLIX.COM'), self.netflix.pk)
+            self.assertEqual(self.resolver.resolve('NETFLIX.COM* CA'), self.netflix.pk)
+            self.assertIsNone(self.resolver.resolve('GROCER'))
+
+    def test_alias_change_reloads(self):
+        """
+        Test that an existing resolver picks up new aliases, including for descriptions it already cached.
+        """
+        self.assertIsNone(self.resolver.resolve('SPOTIFY USA'))
+        spotify = Entity.objects.create(name='Spotify')
+        EntityAlias.objects.create(entity=spotify, raw_description_pattern='SPOTIFY USA')
+        self.assertEqual(self.resolver.resolve('SPOTIFY USA'), spotify.pk)